@@ -1,12 +1,19 @@
+import multiprocessing
+import os
+import time
 import typing as tp
 import uvicorn
 
+from app.logic import run_publisher
 from app.utils import (
     TestCaseApiConfig,
+    get_config_path,
 )
 
 from .fastapi_init import app
 
+SNAPSHOT_WAIT_TIMEOUT = 30.0
+
 
 def _run_uvicorn(configuration: dict[str, tp.Any]) -> tp.NoReturn:
     uvicorn.run(
@@ -15,14 +22,55 @@ def _run_uvicorn(configuration: dict[str, tp.Any]) -> tp.NoReturn:
     )
 
 
+def _wait_for_snapshot(path: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.1)
+    return True
+
+
+def _run_workers(config: TestCaseApiConfig, configuration: dict[str, tp.Any]) -> tp.NoReturn:
+    """
+    one publisher process fetches the schedule into the snapshot file,
+    uvicorn workers only map that file
+    """
+    publisher = multiprocessing.get_context("spawn").Process(
+        target=run_publisher,
+        args=(config,),
+        name="schedule-publisher",
+        daemon=True,
+    )
+    publisher.start()
+    try:
+        if not _wait_for_snapshot(config.snapshot_config.path, SNAPSHOT_WAIT_TIMEOUT):
+            # workers without a snapshot could not answer anything
+            raise SystemExit(
+                f"Schedule snapshot {config.snapshot_config.path} was not published "
+                f"within {SNAPSHOT_WAIT_TIMEOUT:.0f}s, is the upstream reachable?"
+            )
+        uvicorn.run(
+            "app.fastapi_init:app",
+            workers=config.app.workers,
+            **configuration,
+        )
+    finally:
+        publisher.terminate()
+        publisher.join()
+
+
 def main():
-    config = TestCaseApiConfig.load('config.yaml')
+    config = TestCaseApiConfig.load(get_config_path())
 
     uvicorn_config = {
         "host": config.app.host,
         "port": config.app.port,
     }
-    _run_uvicorn(uvicorn_config)
+    if config.app.workers > 1:
+        _run_workers(config, uvicorn_config)
+    else:
+        _run_uvicorn(uvicorn_config)
 
 
 if __name__ == "__main__":
@@ -2,14 +2,18 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.handlers import routers_list
-from app.http_clients import ScheduleClient
-from app.logic import ScheduleService
+from app.http_clients import ScheduleClient, SharedScheduleClient, create_session
+from app.logic import ScheduleRefresher, ScheduleService
 from app.middlewares import (
+        DeadlineMiddleware,
         ExceptionHandlerMiddleware,
+        MetricsMiddleware,
+        ProfilingMiddleware,
 )
-from app.utils import TestCaseApiConfig
+from app.utils import HAS_ORJSON, TestCaseApiConfig, get_config_path
 
 
 def get_app(prefix: str = "/api") -> FastAPI:
@@ -23,26 +27,43 @@ def get_app(prefix: str = "/api") -> FastAPI:
         contact={"name": "Banakh Andrei", "email": "uuetsukeu@mail.ru"},
         license_info={"name": "MIT"},
         lifespan=lifespan,
+        default_response_class=ORJSONResponse if HAS_ORJSON else JSONResponse,
     )
 
 
-    app.state.config = TestCaseApiConfig.load('config.yaml')
+    app.state.config = TestCaseApiConfig.load(get_config_path())
 
     for route in routers_list:
         app.include_router(route)
 
+    app.add_middleware(
+        DeadlineMiddleware,
+        timeout=app.state.config.app.request_timeout,
+        header=app.state.config.app.deadline_header,
+    )
+
     app.add_middleware(
         ExceptionHandlerMiddleware,
         debug = True
     )
 
+    profiling_config = app.state.config.profiling_config
+    if profiling_config.enabled:
+        app.add_middleware(
+            ProfilingMiddleware,
+            header=profiling_config.header,
+            directory=profiling_config.directory,
+        )
+
+    app.add_middleware(MetricsMiddleware)
+
     origins = ["*"]
 
     app.add_middleware(
         CORSMiddleware,
         allow_origins=origins,
         allow_credentials=True,
-        allow_methods=["GET"],
+        allow_methods=["GET", "POST"],
         allow_headers=["*"],
     )
 
@@ -54,10 +75,41 @@ async def lifespan(app: FastAPI):
     """
     Lifespan function.
     """
+    service_config = app.state.config.service_config
+    schedule_session = None
+    if app.state.config.app.workers > 1:
+        # the publisher process started by app.__main__ is the only one requesting upstream
+        schedule_client = SharedScheduleClient(
+            app.state.config.schedule_config,
+            path=app.state.config.snapshot_config.path,
+        )
+    else:
+        snapshot_config = app.state.config.snapshot_config
+        schedule_session = create_session(app.state.config.schedule_config)
+        schedule_client = ScheduleClient(
+            app.state.config.schedule_config,
+            session=schedule_session,
+            snapshot_path=snapshot_config.path if snapshot_config.persist else None,
+        )
+        schedule_client.load_snapshot_file()
     app.state.schedule_service = ScheduleService(
-        schedule_client = ScheduleClient(app.state.config.schedule_config)
+        schedule_client = schedule_client,
+        engine=service_config.engine,
+        background_refresh=service_config.refresh_interval > 0,
+        coalesce_requests=service_config.coalesce_requests,
     )
 
-    yield
+    refresher = None
+    if service_config.refresh_interval > 0:
+        refresher = ScheduleRefresher(app.state.schedule_service, service_config.refresh_interval)
+        await refresher.start()
+
+    try:
+        yield
+    finally:
+        if refresher is not None:
+            await refresher.stop()
+        if schedule_session is not None:
+            await schedule_session.close()
 
 app = get_app()
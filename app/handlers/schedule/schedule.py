@@ -1,5 +1,10 @@
-from fastapi import Query, Request, status
+import hashlib
+from dataclasses import dataclass
 from datetime import date
+from typing import Any, AsyncIterator, Iterable
+
+from fastapi import Body, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.schemas import (
     TimeSlotSchema, 
@@ -9,11 +14,79 @@ from app.schemas import (
     ObjectNotFoundResponse,
     TimeoutErrorResponse
 )
-from app.models import TimeSlot, TimeInterval
+from app.models import MinuteInterval, TimeSlot, TimeInterval
+from app.utils import json_dumps, minutes_to_str
 
 from .routers import schedule_router
 
 
+def _set_schedule_headers(response: Response, schedule_service, cache_headers: dict[str, str] | None = None):
+    """exposes how old the schedule behind the response is and how long it may be cached"""
+    if cache_headers:
+        response.headers.update(cache_headers)
+    snapshot_age = schedule_service.snapshot_age
+    if snapshot_age is not None:
+        response.headers["X-Schedule-Age"] = str(int(snapshot_age))
+
+
+def _get_cache_headers(request: Request, snapshot) -> dict[str, str]:
+    """
+    ETag is derived from schedule version and the query,
+    so it changes only when the answer to the query may change,
+    the answer has to be computed from the same `snapshot`
+    """
+    version = snapshot.version
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{version}|{request.url.path}|{query}".encode(), digest_size=12).hexdigest()
+    max_age = request.app.state.config.app.cache_max_age
+    return {
+        "ETag": f'"{digest}"',
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+
+
+def _is_not_modified(request: Request, cache_headers: dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+    return cache_headers["ETag"] in etags
+
+
+def _not_modified_response(schedule_service, cache_headers: dict[str, str]) -> Response:
+    not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    _set_schedule_headers(not_modified, schedule_service, cache_headers)
+    return not_modified
+
+
+@dataclass
+class _ConditionalSnapshot:
+    """
+    snapshot a query is answered from with the cache headers derived from it,
+    `not_modified` is the 304 response to return when the client already holds the answer
+    """
+
+    service: Any
+    snapshot: Any
+    cache_headers: dict[str, str]
+    not_modified: Response | None
+
+    def set_headers(self, response: Response):
+        _set_schedule_headers(response, self.service, self.cache_headers)
+
+
+async def _get_conditional_snapshot(request: Request) -> _ConditionalSnapshot:
+    schedule_service = request.app.state.schedule_service
+    snapshot = await schedule_service.get_snapshot()
+    cache_headers = _get_cache_headers(request, snapshot)
+    not_modified = None
+    if _is_not_modified(request, cache_headers):
+        not_modified = _not_modified_response(schedule_service, cache_headers)
+    return _ConditionalSnapshot(schedule_service, snapshot, cache_headers, not_modified)
+
+
 @schedule_router.get(
     '/schedule/busy_slots',
     response_model=list[TimeIntervalSchema],
@@ -27,10 +100,16 @@ from .routers import schedule_router
 )
 async def get_busy_slots(
     request: Request,
+    response: Response,
     day: date,
 ):
-    schedule_service = request.app.state.schedule_service
-    return [interval.to_schema() for interval in await schedule_service.get_busy_intervals(day)]
+    current = await _get_conditional_snapshot(request)
+    if current.not_modified is not None:
+        return current.not_modified
+
+    busy_intervals = await current.service.get_busy_intervals(day, snapshot=current.snapshot)
+    current.set_headers(response)
+    return [interval.to_schema() for interval in busy_intervals]
 
 
 @schedule_router.get(
@@ -46,10 +125,90 @@ async def get_busy_slots(
 )
 async def get_free_slots(
     request: Request,
+    response: Response,
     day: date,
 ):
-    schedule_service = request.app.state.schedule_service
-    return [interval.to_schema() for interval in await schedule_service.get_free_intervals(day)]
+    current = await _get_conditional_snapshot(request)
+    if current.not_modified is not None:
+        return current.not_modified
+
+    free_intervals = await current.service.get_free_intervals(day, snapshot=current.snapshot)
+    current.set_headers(response)
+    return [interval.to_schema() for interval in free_intervals]
+
+
+async def _ndjson_day_intervals(day_intervals: Iterable[tuple[date, list[MinuteInterval]]]) -> AsyncIterator[bytes]:
+    """
+    async on purpose, the intervals are already in memory and StreamingResponse
+    would run every chunk of a sync iterator through the threadpool
+    """
+    for day, intervals in day_intervals:
+        yield json_dumps({
+            "day": day.isoformat(),
+            "intervals": [{"start": minutes_to_str(start), "end": minutes_to_str(end)} for start, end in intervals],
+        }) + b"\n"
+
+
+def _validate_range(date_from: date, date_to: date):
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="date_from must not be after date_to",
+        )
+
+
+@schedule_router.get(
+    '/schedule/busy_slots/range',
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "one {day, intervals} object per line"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        502: {"model": GatewayErrorResponse, "description": "todo"},
+        504: {"model": TimeoutErrorResponse, "description": "todo"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def get_busy_slots_range(
+    request: Request,
+    date_from: date,
+    date_to: date,
+):
+    _validate_range(date_from, date_to)
+    current = await _get_conditional_snapshot(request)
+    if current.not_modified is not None:
+        return current.not_modified
+
+    day_intervals = await current.service.get_busy_intervals_range(date_from, date_to, snapshot=current.snapshot)
+    response = StreamingResponse(_ndjson_day_intervals(day_intervals), media_type="application/x-ndjson")
+    current.set_headers(response)
+    return response
+
+
+@schedule_router.get(
+    '/schedule/free_slots/range',
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "one {day, intervals} object per line"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        502: {"model": GatewayErrorResponse, "description": "todo"},
+        504: {"model": TimeoutErrorResponse, "description": "todo"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def get_free_slots_range(
+    request: Request,
+    date_from: date,
+    date_to: date,
+):
+    _validate_range(date_from, date_to)
+    current = await _get_conditional_snapshot(request)
+    if current.not_modified is not None:
+        return current.not_modified
+
+    day_intervals = await current.service.get_free_intervals_range(date_from, date_to, snapshot=current.snapshot)
+    response = StreamingResponse(_ndjson_day_intervals(day_intervals), media_type="application/x-ndjson")
+    current.set_headers(response)
+    return response
 
 
 @schedule_router.get(
@@ -65,10 +224,38 @@ async def get_free_slots(
 )
 async def is_slot_free(
     request: Request,
+    response: Response,
     time_slot: TimeSlotSchema = Query(..., description="todo"),
+):
+    current = await _get_conditional_snapshot(request)
+    if current.not_modified is not None:
+        return current.not_modified
+
+    is_free = await current.service.is_slot_free(TimeSlot.from_schema(time_slot), snapshot=current.snapshot)
+    current.set_headers(response)
+    return is_free
+
+
+@schedule_router.post(
+    '/schedule/is_slots_free',
+    response_model=list[bool],
+    responses={
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        502: {"model": GatewayErrorResponse, "description": "todo"},
+        404: {"model": ObjectNotFoundResponse, "description": "todo"},
+        504: {"model": TimeoutErrorResponse, "description": "todo"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def are_slots_free(
+    request: Request,
+    response: Response,
+    time_slots: list[TimeSlotSchema] = Body(..., max_length=1000, description="slots to check, answers keep their order"),
 ):
     schedule_service = request.app.state.schedule_service
-    return await schedule_service.is_slot_free(TimeSlot.from_schema(time_slot))
+    are_free = await schedule_service.are_slots_free([TimeSlot.from_schema(time_slot) for time_slot in time_slots])
+    _set_schedule_headers(response, schedule_service)
+    return are_free
 
 
 @schedule_router.get(
@@ -84,13 +271,50 @@ async def is_slot_free(
 )
 async def find_free_slot(
     request: Request,
+    response: Response,
     start: str = Query(..., description="todo"),
     end: str = Query(..., description="todo"),
 ):
 
     time_interval = TimeIntervalSchema(start=start,end=end)
-    schedule_service = request.app.state.schedule_service
-    return (await schedule_service.find_free_slot(TimeInterval.from_schema(time_interval))).to_schema()
+    current = await _get_conditional_snapshot(request)
+    if current.not_modified is not None:
+        return current.not_modified
+
+    free_slot = await current.service.find_free_slot(TimeInterval.from_schema(time_interval), snapshot=current.snapshot)
+    current.set_headers(response)
+    return free_slot.to_schema()
+
+
+@schedule_router.get(
+    '/schedule/find_free_slots',
+    response_model=list[TimeSlotSchema],
+    responses={
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        502: {"model": GatewayErrorResponse, "description": "todo"},
+        404: {"model": ObjectNotFoundResponse, "description": "todo"},
+        504: {"model": TimeoutErrorResponse, "description": "todo"},
+    },
+    status_code=status.HTTP_200_OK,
+)
+async def find_free_slots(
+    request: Request,
+    response: Response,
+    start: str = Query(..., description="todo"),
+    end: str = Query(..., description="todo"),
+    limit: int = Query(1, ge=1, le=1000, description="max number of earliest matching days"),
+):
+
+    time_interval = TimeIntervalSchema(start=start,end=end)
+    current = await _get_conditional_snapshot(request)
+    if current.not_modified is not None:
+        return current.not_modified
+
+    free_slots = await current.service.find_free_slots(
+        TimeInterval.from_schema(time_interval), limit=limit, snapshot=current.snapshot
+    )
+    current.set_headers(response)
+    return [free_slot.to_schema() for free_slot in free_slots]
 
 @schedule_router.post(
     '/schedule/hire_me',
@@ -2,6 +2,7 @@
 All FastApi system handlers&routers are exported from this module.
 """
 
+from .metrics import get_metrics
 from .redirect_to_swagger import redirect_to_swagger_docs
 from .routers import system_router
 
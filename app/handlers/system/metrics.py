@@ -0,0 +1,32 @@
+"""
+Metrics handler is defined here
+"""
+
+from fastapi import Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.utils import REGISTRY
+
+from .routers import system_router
+
+SCHEDULE_CACHE_HIT_RATIO = REGISTRY.gauge(
+    "schedule_cache_hit_ratio",
+    "Share of ScheduleClient snapshot cache lookups served without loading",
+)
+
+
+def _collect_cache_metrics(schedule_service) -> None:
+    """the hit ratio is a property of the current cache, it is copied into a gauge on scrape"""
+    SCHEDULE_CACHE_HIT_RATIO.set(schedule_service.schedule_client.cache.hit_ratio)
+
+
+@system_router.get("/metrics", status_code=status.HTTP_200_OK, response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    """
+    Prometheus text exposition of in-process metrics,
+    with several workers every worker reports only its own numbers
+    """
+    schedule_service = getattr(request.app.state, "schedule_service", None)
+    if schedule_service is not None:
+        _collect_cache_metrics(schedule_service)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,17 @@
-from .schedule_client import ScheduleClient
+from .schedule_client import ScheduleClient, StaleScheduleError
+from .shared_schedule_client import SharedScheduleClient
 
+from .cache import SnapshotCache
+
+from .deadline import (
+    DeadlineExceededError,
+    check_deadline,
+    remaining,
+    reset_deadline,
+    set_deadline,
+    start_shared,
+    wait_within_deadline,
+)
 from .exceptions import (
     APIConnectionError,
     APIError,
@@ -10,7 +22,26 @@ from .exceptions import (
 from .http_client import (
     BaseClient,
 )
+from .parsers import (
+    DayRecord,
+    SchedulePayload,
+    StreamingScheduleParser,
+    TimeslotRecord,
+    decode_schedule_payload,
+    parse_schedule,
+)
 from .requests import (
+    CircuitBreaker,
+    ConditionalRequestCache,
+    HedgingPolicy,
+    create_session,
     handle_get_request,
 )
 
+from .snapshot_file import (
+    SnapshotFileError,
+    dump_schedule,
+    load_schedule,
+    read_schedule_file,
+    write_schedule_file,
+)
@@ -0,0 +1,81 @@
+"""
+Upstream snapshot cache is defined here
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from app.utils import REGISTRY
+
+from .deadline import start_shared, wait_within_deadline
+
+SNAPSHOT_CACHE_REQUESTS = REGISTRY.counter(
+    "schedule_cache_requests_total",
+    "ScheduleClient snapshot cache lookups by result",
+    ("result",),
+)
+
+
+class SnapshotCache:
+    """
+    Holds a single upstream payload for `ttl` seconds.
+
+    Callers arriving while a load is already running await that load instead
+    of starting their own, so a cold cache costs one upstream request no matter
+    how many requests hit it at once.
+
+    The load runs without a request deadline, every caller waits for it
+    only as long as its own deadline allows.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._value: Any = None
+        self._loaded = False
+        self._expires_at = 0.0
+        self._inflight: asyncio.Future | None = None
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def set(self, value: Any) -> None:
+        """stores a value obtained elsewhere as if it was just loaded"""
+        self._value = value
+        self._loaded = True
+        self._expires_at = self._clock() + self.ttl
+
+    def invalidate(self) -> None:
+        self._loaded = False
+        self._value = None
+
+    async def get(self, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if self._inflight is not None:
+            self.hits += 1
+            SNAPSHOT_CACHE_REQUESTS.inc(result="hit")
+            return await wait_within_deadline(self._inflight)
+
+        if self._loaded and self._clock() < self._expires_at:
+            self.hits += 1
+            SNAPSHOT_CACHE_REQUESTS.inc(result="hit")
+            return self._value
+
+        self.misses += 1
+        SNAPSHOT_CACHE_REQUESTS.inc(result="miss")
+        self._inflight = start_shared(self._load(loader))
+        return await wait_within_deadline(self._inflight)
+
+    async def _load(self, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self.set(value)
+            return value
+        finally:
+            self._inflight = None
@@ -0,0 +1,82 @@
+"""
+Per-request deadline carried through contextvars is defined here
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable
+
+from .exceptions import APITimeoutError
+
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceededError(APITimeoutError):
+    """Time budget of the incoming request ran out, the rest of the work is abandoned."""
+
+
+def set_deadline(timeout: float | None) -> Token:
+    """
+    starts a time budget of `timeout` seconds for the current context,
+    a budget already running is never extended
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    current = _deadline.get()
+    if current is not None and (deadline is None or current < deadline):
+        deadline = current
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """seconds left of the current budget, None without a deadline"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError(f"Request deadline exceeded by {-left:.3f}s")
+
+
+async def _without_deadline(work: Awaitable[Any]) -> Any:
+    # runs in the task's own copy of the context, the caller's budget stays in place
+    _deadline.set(None)
+    return await work
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # every waiter may have given up already, keep asyncio from reporting the exception as never retrieved
+    if not task.cancelled():
+        task.exception()
+
+
+def start_shared(work: Awaitable[Any]) -> asyncio.Task:
+    """
+    starts work shared by several requests as a task which runs without a deadline,
+    so it is not bound to the budget of the request which happened to start it
+    """
+    task = asyncio.ensure_future(_without_deadline(work))
+    task.add_done_callback(_retrieve_exception)
+    return task
+
+
+async def wait_within_deadline(future: asyncio.Future) -> Any:
+    """
+    awaits result of shared work for no longer than the current budget,
+    neither running out of it nor cancellation of the caller stop the work itself
+    """
+    left = remaining()
+    await asyncio.wait((future,), timeout=None if left is None else max(left, 0))
+    if not future.done():
+        raise DeadlineExceededError("Request deadline exceeded while waiting for shared work")
+    return future.result()
@@ -33,6 +33,9 @@ def handle_exceptions(func: Callable) -> Callable:
     async def _wrapper(*args, **kwargs):
         try:
             return await func(*args, **kwargs)
+        except APIError:
+            # already meaningful for the middleware, e.g. DeadlineExceededError is a TimeoutError as well
+            raise
         except ClientConnectionError as exc:
             client = args[0]
             raise APIConnectionError(f"Error on connection by {client}") from exc
@@ -0,0 +1,212 @@
+"""
+Upstream payload parsers are defined here
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+import re
+from datetime import date
+from operator import itemgetter
+from typing import NamedTuple
+
+from app.models import DaySchedule, MinuteInterval
+from app.utils import json_loads, str_to_minutes
+
+
+class DayRecord(NamedTuple):
+    id: int
+    date: str
+    start: str
+    end: str
+
+
+class TimeslotRecord(NamedTuple):
+    day_id: int
+    start: str
+    end: str
+
+
+_day_fields = itemgetter(*DayRecord._fields)
+_timeslot_fields = itemgetter(*TimeslotRecord._fields)
+
+
+class SchedulePayload(NamedTuple):
+    """
+    decoded /test-task/ body, day & timeslot objects are kept as the json decoder made them,
+    records are built only when asked for, parse_schedule reads the fields it needs straight away
+    """
+
+    days: list[dict]
+    timeslots: list[dict]
+
+    def day_records(self) -> list[DayRecord]:
+        return list(map(DayRecord._make, map(_day_fields, self.days)))
+
+    def timeslot_records(self) -> list[TimeslotRecord]:
+        return list(map(TimeslotRecord._make, map(_timeslot_fields, self.timeslots)))
+
+
+def decode_schedule_payload(body: bytes) -> SchedulePayload:
+    """decodes /test-task/ response body, costs no more than the json decoding itself"""
+    data = json_loads(body) if body else None
+    if not isinstance(data, dict):
+        return SchedulePayload(days=[], timeslots=[])
+
+    return SchedulePayload(days=data.get('days') or [], timeslots=data.get('timeslots') or [])
+
+
+def parse_schedule(payload: SchedulePayload) -> dict[date, DaySchedule]:
+    """
+    converts /test-task/ payload into working days ordered by date
+
+    timeslots are grouped by day_id in one pass over the decoded objects,
+    times are converted to minutes once per distinct "HH:MM" value (there are at most 1440 of them)
+    """
+    times: dict[str, int] = {}
+    timeslots_by_day = defaultdict(list)
+    for day_id, start, end in map(_timeslot_fields, payload.timeslots):
+        try:
+            interval = MinuteInterval(times[start], times[end])
+        except KeyError:
+            # a plain dict is looked up faster than _MinutesCache, misses are rare
+            interval = MinuteInterval(
+                times.setdefault(start, str_to_minutes(start)),
+                times.setdefault(end, str_to_minutes(end)),
+            )
+        timeslots_by_day[day_id].append(interval)
+
+    return _build_schedule(payload.day_records(), timeslots_by_day, _MinutesCache(times))
+
+
+def _build_schedule(
+    days: list[DayRecord],
+    timeslots_by_day: dict[int, list[MinuteInterval]],
+    times: dict[str, int],
+) -> dict[date, DaySchedule]:
+    schedule = {}
+    for working_day in sorted(days, key=lambda d: d.date):
+        day = date.fromisoformat(working_day.date)
+        schedule[day] = DaySchedule(
+            day=day,
+            working_hours=MinuteInterval(times[working_day.start], times[working_day.end]),
+            timeslots=tuple(timeslots_by_day.get(working_day.id, ())),
+        )
+    return schedule
+
+
+class _MinutesCache(dict):
+    """converts "HH:MM" into minutes once per distinct value"""
+
+    def __missing__(self, key: str) -> int:
+        value = self[key] = str_to_minutes(key)
+        return value
+
+
+_STRUCTURE_TOKENS = re.compile(rb'[\[\]{}"]')
+_STRING_TOKENS = re.compile(rb'["\\]')
+_FLAT_ELEMENT = re.compile(rb'[\s,]*(\{[^{}"]*(?:"(?:[^"\\]|\\.)*"[^{}"]*)*\})', re.DOTALL)
+_OPENING = frozenset(b"[{")
+_SECTIONS = (b"days", b"timeslots")
+
+
+class StreamingScheduleParser:
+    """
+    Incremental /test-task/ parser, response body is fed chunk by chunk.
+
+    Only a single "days" or "timeslots" element is held as bytes at any moment,
+    every element is turned into index entries as soon as it is complete,
+    so memory is bounded by the resulting schedule rather than by the body size.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key = bytearray()
+        self._section: bytes | None = None
+        self._element: bytearray | None = None
+        self._times = _MinutesCache()
+        self._days: list[DayRecord] = []
+        self._timeslots_by_day: dict[int, list[MinuteInterval]] = defaultdict(list)
+
+    def feed(self, chunk: bytes) -> None:
+        position = 0
+        length = len(chunk)
+        element_start = 0 if self._element is not None else None
+
+        if self._escape and length:
+            self._escape = False
+            position = 1
+
+        while position < length:
+            if self._depth == 2 and element_start is None and not self._in_string and self._section in _SECTIONS:
+                # complete flat elements are cut out by a single regex and decoded in one batch,
+                # the token loop below only deals with an element split between chunks
+                elements = []
+                while (match := _FLAT_ELEMENT.match(chunk, position)) is not None:
+                    elements.append(match.group(1))
+                    position = match.end()
+                if elements:
+                    self._handle_elements(elements)
+                    continue
+
+            if self._in_string:
+                match = _STRING_TOKENS.search(chunk, position)
+                end = match.start() if match is not None else length
+                if self._depth == 1:
+                    self._key += chunk[position:end]
+                if match is None:
+                    break
+                if chunk[end] == 0x5C:  # backslash, next byte is escaped
+                    if end + 1 >= length:
+                        self._escape = True
+                    position = end + 2
+                    continue
+                self._in_string = False
+                position = end + 1
+                continue
+
+            match = _STRUCTURE_TOKENS.search(chunk, position)
+            if match is None:
+                break
+            index = match.start()
+            token = chunk[index]
+            position = index + 1
+
+            if token == 0x22:  # opening quote
+                self._in_string = True
+                if self._depth == 1:
+                    self._key = bytearray()
+            elif token in _OPENING:
+                self._depth += 1
+                if self._depth == 2:
+                    self._section = bytes(self._key) if token == 0x5B else None
+                elif self._depth == 3 and token == 0x7B and self._section in _SECTIONS:
+                    element_start = index
+            else:
+                if self._depth == 3 and token == 0x7D and element_start is not None:
+                    self._handle_elements([bytes(self._element or b"") + chunk[element_start:index + 1]])
+                    self._element = None
+                    element_start = None
+                self._depth -= 1
+
+        if element_start is not None:
+            if self._element is None:
+                self._element = bytearray()
+            self._element += chunk[element_start:]
+
+    def _handle_elements(self, raw_elements: list[bytes]) -> None:
+        elements = json_loads(b"[" + b",".join(raw_elements) + b"]")
+        if self._section == b"days":
+            self._days.extend(map(DayRecord._make, map(_day_fields, elements)))
+            return
+        times = self._times
+        timeslots_by_day = self._timeslots_by_day
+        for day_id, start, end in map(_timeslot_fields, elements):
+            timeslots_by_day[day_id].append(MinuteInterval(times[start], times[end]))
+
+    def result(self) -> dict[date, DaySchedule]:
+        if self._depth != 0 or self._in_string:
+            raise ValueError("Incomplete schedule document")
+        return _build_schedule(self._days, self._timeslots_by_day, self._times)
@@ -4,11 +4,283 @@ Sending request method is defined here
 
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Protocol
 
 import aiohttp
 #import structlog
 
+from app.utils import REGISTRY, SIZE_BUCKETS, ApiConfig, json_loads
+
+from .deadline import DeadlineExceededError, check_deadline, remaining
+from .exceptions import APIConnectionError
+
+UPSTREAM_REQUEST_SECONDS = REGISTRY.histogram(
+    "upstream_request_duration_seconds",
+    "Upstream request duration including body download and decoding",
+    ("method", "status"),
+)
+UPSTREAM_PAYLOAD_BYTES = REGISTRY.histogram(
+    "upstream_payload_size_bytes",
+    "Size of successful upstream response bodies",
+    ("method",),
+    buckets=SIZE_BUCKETS,
+)
+UPSTREAM_HEDGES = REGISTRY.counter(
+    "upstream_hedged_requests_total",
+    "Second upstream attempts sent because the first one was slower than the hedging delay",
+    ("outcome",),
+)
+UPSTREAM_NOT_MODIFIED = REGISTRY.counter(
+    "upstream_not_modified_responses_total",
+    "Upstream requests answered with 304 and served from the conditional cache",
+)
+CIRCUIT_BREAKER_STATE = REGISTRY.gauge(
+    "upstream_circuit_breaker_open",
+    "1 while upstream circuit breaker is open or half-open, 0 when closed",
+)
+CIRCUIT_BREAKER_EVENTS = REGISTRY.counter(
+    "upstream_circuit_breaker_events_total",
+    "Upstream circuit breaker transitions and requests rejected while it is open",
+    ("event",),
+)
+
+# exceptions meaning the upstream is unhealthy, as opposed to bad payloads or cancellation
+UPSTREAM_FAILURES = (aiohttp.ClientError, asyncio.TimeoutError, APIConnectionError)
+
+
+def create_session(api_config: ApiConfig) -> aiohttp.ClientSession:
+    """
+    creates long-lived session with pooled keep-alive connections,
+    it is meant to be shared by all requests to the given api
+    """
+    connector = aiohttp.TCPConnector(
+        limit=api_config.connection_limit,
+        keepalive_timeout=api_config.keepalive_timeout,
+        ttl_dns_cache=api_config.dns_cache_ttl,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class StreamParser(Protocol):
+    def feed(self, chunk: bytes) -> None: ...
+
+    def result(self) -> Any: ...
+
+
+@dataclass
+class _ValidatedResponse:
+    etag: str | None
+    last_modified: str | None
+    payload: Any
+
+
+class ConditionalRequestCache:
+    """
+    Remembers ETag / Last-Modified validators with the decoded payload per url,
+    so that the next request can be made conditional and a 304 answered
+    with the very same payload object instead of downloading and decoding it again.
+    """
+
+    def __init__(self):
+        self.not_modified = 0
+        self._responses: dict[tuple, _ValidatedResponse] = {}
+
+    @staticmethod
+    def _key(url: str, params: dict[str, Any]) -> tuple:
+        return url, tuple(sorted(params.items()))
+
+    def get(self, url: str, params: dict[str, Any]) -> _ValidatedResponse | None:
+        return self._responses.get(self._key(url, params))
+
+    def store(self, url: str, params: dict[str, Any], response: aiohttp.ClientResponse, payload: Any) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        key = self._key(url, params)
+        if etag is None and last_modified is None:
+            self._responses.pop(key, None)
+            return
+        self._responses[key] = _ValidatedResponse(etag=etag, last_modified=last_modified, payload=payload)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures and then rejects
+    requests with APIConnectionError right away instead of waiting for timeouts.
+    After `reset_timeout` seconds a single trial request is let through (half-open),
+    its success closes the breaker and its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._clock = clock
+        self._opened_at = 0.0
+        self._trial_inflight = False
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            CIRCUIT_BREAKER_EVENTS.inc(event=state)
+        self.state = state
+        CIRCUIT_BREAKER_STATE.set(0 if state == self.CLOSED else 1)
+
+    def _reject(self):
+        CIRCUIT_BREAKER_EVENTS.inc(event="rejected")
+        raise APIConnectionError("Circuit breaker is open, upstream is considered unhealthy")
+
+    def before_request(self) -> None:
+        if self.state == self.OPEN:
+            if self._clock() - self._opened_at < self.reset_timeout:
+                self._reject()
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._trial_inflight:
+                self._reject()
+            self._trial_inflight = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._trial_inflight = False
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_inflight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+            self._set_state(self.OPEN)
+
+    def release(self) -> None:
+        """request ended neither with success nor with upstream failure (e.g. cancelled)"""
+        self._trial_inflight = False
+
+
+class HedgingPolicy:
+    """
+    Sends a second attempt when the first one is still running after the
+    `quantile` of recently observed upstream latencies, the first successful
+    attempt wins and the other one is cancelled.
+    Until `min_samples` latencies are known `max_delay` is used.
+
+    A first attempt cancelled because the hedge won is recorded with the time
+    it had been running, a lower bound of its latency, otherwise only the fast
+    side would be seen and the delay would shrink towards `min_delay`.
+    Hedges are limited to `budget` of requests: every request earns `budget`
+    of a token, a hedge spends a whole one and at most `burst` are saved up,
+    so a uniformly slow upstream does not get its load doubled.
+    """
+
+    def __init__(
+        self,
+        quantile: float,
+        min_delay: float,
+        max_delay: float,
+        window: int = 100,
+        min_samples: int = 10,
+        budget: float = 0.1,
+        burst: float = 10,
+    ):
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.budget = budget
+        self.burst = burst
+        self._tokens = burst
+        self._latencies: deque[float] = deque(maxlen=window)
+
+    def delay(self) -> float:
+        if len(self._latencies) < self.min_samples:
+            return self.max_delay
+        latencies = sorted(self._latencies)
+        value = latencies[min(int(len(latencies) * self.quantile), len(latencies) - 1)]
+        return min(max(value, self.min_delay), self.max_delay)
+
+    async def _timed(self, send: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.perf_counter()
+        result = await send()
+        self._latencies.append(time.perf_counter() - started)
+        return result
+
+    async def run(self, send: Callable[[], Awaitable[Any]]) -> Any:
+        self._tokens = min(self._tokens + self.budget, self.burst)
+        started = time.perf_counter()
+        first = asyncio.ensure_future(self._timed(send))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay())
+            if done:
+                return first.result()
+            if self._tokens < 1:
+                UPSTREAM_HEDGES.inc(outcome="over_budget")
+                return await first
+
+            self._tokens -= 1
+            UPSTREAM_HEDGES.inc(outcome="sent")
+            hedge = asyncio.ensure_future(self._timed(send))
+            tasks.add(hedge)
+            pending = set(tasks)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            UPSTREAM_HEDGES.inc(outcome="won")
+                            if not first.done():
+                                # cancelled below, it has taken at least this long
+                                self._latencies.append(time.perf_counter() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+async def _resilient_request(
+    send: Callable[[], Awaitable[Any]],
+    hedging: HedgingPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+) -> Any:
+    check_deadline()
+    if circuit_breaker is not None:
+        circuit_breaker.before_request()
+    try:
+        result = await (hedging.run(send) if hedging is not None else send())
+    except UPSTREAM_FAILURES as exc:
+        left = remaining()
+        if isinstance(exc, asyncio.TimeoutError) and left is not None and left <= 0:
+            # the caller's budget ran out, that says nothing about upstream health
+            if circuit_breaker is not None:
+                circuit_breaker.release()
+            if isinstance(exc, DeadlineExceededError):
+                raise
+            raise DeadlineExceededError("Request deadline exceeded while waiting for upstream") from exc
+        if circuit_breaker is not None:
+            circuit_breaker.record_failure()
+        raise
+    except BaseException:
+        if circuit_breaker is not None:
+            circuit_breaker.release()
+        raise
+    if circuit_breaker is not None:
+        circuit_breaker.record_success()
+    return result
+
 
 async def _handle_request(
     method: str,
@@ -17,30 +289,84 @@ async def _handle_request(
     headers: dict[str, Any] | None = None,
     session: aiohttp.ClientSession | None = None,
     json: dict | None = None,
-) -> dict | None:
+    conditional_cache: ConditionalRequestCache | None = None,
+    decoder: Callable[[bytes], Any] = json_loads,
+    stream_parser: Callable[[], StreamParser] | None = None,
+    timeout: float | None = None,
+) -> Any:
     """
-    handles HTTP requests (GET, POST, DELETE) and returns response
+    handles HTTP requests (GET, POST, DELETE) and returns response body decoded by `decoder`,
+    with `stream_parser` the body is fed to a new parser chunk by chunk instead of being read whole,
+    with `conditional_cache` the request is sent with If-None-Match / If-Modified-Since
+    and on 304 previously decoded payload is returned as is,
+    5xx responses raise APIConnectionError,
+    the request is given `timeout` seconds or whatever is left of the current deadline if it is less
     """
     params = params or {}
-    headers = headers or {}
+    headers = dict(headers or {})
+
+    cached = conditional_cache.get(url, params) if conditional_cache is not None else None
+    if cached is not None:
+        if cached.etag is not None:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified is not None:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    check_deadline()
+    request_options = {}
+    budget = remaining()
+    if budget is not None and (timeout is None or budget < timeout):
+        timeout = budget
+    if timeout is not None:
+        request_options["timeout"] = aiohttp.ClientTimeout(total=timeout)
 
     new_session = session is None
     if new_session:
         session = aiohttp.ClientSession()
 
+    method = method.upper()
+    # status is reported as the exception name when no response was received
+    status = "error"
+    started = time.perf_counter()
     try:
         async with session.request(
-            method=method.upper(), url=url, params=params, json=json, headers=headers
+            method=method, url=url, params=params, json=json, headers=headers, **request_options
         ) as response:
+            status = str(response.status)
+            if response.status == 304 and cached is not None:
+                conditional_cache.not_modified += 1
+                UPSTREAM_NOT_MODIFIED.inc()
+                return cached.payload
             if response.status == 404:
                 return None
             if response.status == 204:
                 return None
+            if response.status >= 500:
+                raise APIConnectionError(f"Upstream responded with status {response.status}")
             if response.status >= 200 and response.status < 300:
-                return await response.json()
+                if stream_parser is not None:
+                    parser = stream_parser()
+                    size = 0
+                    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        size += len(chunk)
+                        parser.feed(chunk)
+                    payload = parser.result()
+                else:
+                    body = await response.read()
+                    size = len(body)
+                    payload = decoder(body)
+                UPSTREAM_PAYLOAD_BYTES.observe(size, method=method)
+                if conditional_cache is not None:
+                    conditional_cache.store(url, params, response, payload)
+                return payload
 
             response_text = await response.text()
+    except Exception as exc:
+        if status == "error":
+            status = type(exc).__name__
+        raise
     finally:
+        UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, status=status)
         if new_session and session:
             await session.close()
 
@@ -50,5 +376,31 @@ async def handle_get_request(
     params: dict[str, Any] | None = None,
     headers: dict[str, Any] | None = None,
     session: aiohttp.ClientSession | None = None,
-) -> dict | None:
-    return await _handle_request("GET", url, params, headers, session=session)
+    conditional_cache: ConditionalRequestCache | None = None,
+    decoder: Callable[[bytes], Any] = json_loads,
+    stream_parser: Callable[[], StreamParser] | None = None,
+    hedging: HedgingPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    timeout: float | None = None,
+) -> Any:
+    """
+    with `hedging` a slow request is raced by a second one,
+    with `circuit_breaker` requests fail fast while the upstream keeps failing,
+    `timeout` limits every attempt, running out of it is an upstream failure
+    unlike running out of the deadline
+    """
+    return await _resilient_request(
+        lambda: _handle_request(
+            "GET",
+            url,
+            params,
+            headers,
+            session=session,
+            conditional_cache=conditional_cache,
+            decoder=decoder,
+            stream_parser=stream_parser,
+            timeout=timeout,
+        ),
+        hedging=hedging,
+        circuit_breaker=circuit_breaker,
+    )
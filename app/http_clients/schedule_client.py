@@ -2,25 +2,96 @@
 ScheduleClient for gathering data is defined here
 """
 
+from __future__ import annotations
+
+import asyncio
+import os
+import time
 from datetime import date
-import pandas as pd
+from pathlib import Path
+import aiohttp
+import structlog
 from typing import List
 
+from .cache import SnapshotCache
+from .deadline import DeadlineExceededError
 from .exceptions import (
+    APIConnectionError,
     ObjectNotFoundError,
     handle_exceptions,
 )
 from .http_client import (
     BaseClient,
 )
+from .parsers import (
+    SchedulePayload,
+    StreamingScheduleParser,
+    decode_schedule_payload,
+    parse_schedule,
+)
 from .requests import (
+    CircuitBreaker,
+    ConditionalRequestCache,
+    HedgingPolicy,
     handle_get_request,
 )
-from app.models import TimeInterval
-from app.utils import str_to_time
+from .snapshot_file import (
+    SnapshotFileError,
+    read_schedule_file,
+    write_schedule_file,
+)
+from app.models import DaySchedule, TimeInterval
+from app.utils import ApiConfig
+
+
+logger = structlog.get_logger()
+
+
+class StaleScheduleError(APIConnectionError):
+    """
+    Upstream is unavailable, but the last known `schedule` can be served instead,
+    it was last confirmed by the upstream at `confirmed_at` (time.monotonic())
+    """
+
+    def __init__(self, message: str, schedule: dict[date, DaySchedule], confirmed_at: float):
+        super().__init__(message)
+        self.schedule = schedule
+        self.confirmed_at = confirmed_at
 
 
 class ScheduleClient(BaseClient):
+    """
+    With `snapshot_path` every new schedule is persisted into a binary snapshot file,
+    load_snapshot_file() serves it right after restart. While the upstream is
+    unreachable, or does not answer within the request deadline, requests fail
+    with StaleScheduleError carrying the last known schedule, so callers may serve
+    it knowing it is not fresh.
+    """
+
+    def __init__(
+        self,
+        api_config: ApiConfig,
+        session: aiohttp.ClientSession | None = None,
+        snapshot_path: str | Path | None = None,
+    ):
+        super().__init__(api_config)
+        self.session = session
+        self.snapshot_path = Path(snapshot_path) if snapshot_path is not None else None
+        self.cache = SnapshotCache(ttl=api_config.cache_ttl)
+        self.conditional_cache = ConditionalRequestCache()
+        self.hedging = HedgingPolicy(
+            quantile=api_config.hedge_quantile,
+            min_delay=api_config.hedge_min_delay,
+            max_delay=api_config.hedge_max_delay,
+            budget=api_config.hedge_budget,
+        ) if api_config.hedge_quantile > 0 else None
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=api_config.breaker_failure_threshold,
+            reset_timeout=api_config.breaker_reset_timeout,
+        ) if api_config.breaker_failure_threshold > 0 else None
+        self._parsed: tuple[SchedulePayload, dict[date, DaySchedule]] | None = None
+        self._last_schedule: dict[date, DaySchedule] | None = None
+        self._confirmed_at: float | None = None
 
     def __post_init__(self):
         if not (self.config.host.startswith("http")):
@@ -29,68 +100,135 @@ class ScheduleClient(BaseClient):
     def __str__(self):
         return "ScheduleClient"
 
-    @handle_exceptions
-    async def get_day_timeslots(self, day: date) -> list[TimeInterval]:
+    async def _fetch_schedule_data(self) -> SchedulePayload | None:
         url = f"{self.config.host}:{self.config.port}/test-task/"
         headers = {"accept": "application/json"}
-        data = await handle_get_request(url=url, headers=headers)
-
-        if not data or 'days' not in data:
-            raise ObjectNotFoundError(f"No data available for date {date}")
+        return await handle_get_request(
+            url=url,
+            headers=headers,
+            session=self.session,
+            conditional_cache=self.conditional_cache,
+            hedging=self.hedging,
+            circuit_breaker=self.circuit_breaker,
+            decoder=decode_schedule_payload,
+            timeout=self.config.upstream_timeout or None,
+        )
+
+    async def _fetch_schedule_stream(self) -> dict[date, DaySchedule] | None:
+        url = f"{self.config.host}:{self.config.port}/test-task/"
+        headers = {"accept": "application/json"}
+        return await handle_get_request(
+            url=url,
+            headers=headers,
+            session=self.session,
+            conditional_cache=self.conditional_cache,
+            hedging=self.hedging,
+            circuit_breaker=self.circuit_breaker,
+            stream_parser=StreamingScheduleParser,
+            timeout=self.config.upstream_timeout or None,
+        )
+
+    def load_snapshot_file(self) -> bool:
+        """warm start, makes the persisted schedule current until the cache ttl passes"""
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return False
+        try:
+            modified_at = os.stat(self.snapshot_path).st_mtime
+            schedule = read_schedule_file(self.snapshot_path)
+        except (OSError, SnapshotFileError) as exc:
+            logger.warning("Couldn't load schedule snapshot file", path=str(self.snapshot_path), error=str(exc))
+            return False
+        self._last_schedule = schedule
+        # the file was written when the upstream last handed out a new schedule
+        self._confirmed_at = time.monotonic() - max(0.0, time.time() - modified_at)
+        self.cache.set(schedule)
+        return True
+
+    def _persist(self, schedule: dict[date, DaySchedule]) -> None:
+        try:
+            write_schedule_file(self.snapshot_path, schedule)
+        except OSError as exc:
+            logger.warning("Couldn't write schedule snapshot file", path=str(self.snapshot_path), error=str(exc))
+
+    def _stale(self, message: str) -> StaleScheduleError:
+        return StaleScheduleError(message, schedule=self._last_schedule, confirmed_at=self._confirmed_at)
+
+    async def _get_cached_schedule(self) -> dict[date, DaySchedule]:
+        try:
+            return await self.cache.get(self._load_schedule)
+        except DeadlineExceededError as exc:
+            if self._last_schedule is None:
+                raise
+            # the shared load goes on for later requests, this one is answered in time
+            raise self._stale(f"Upstream did not answer within the request deadline: {exc}") from exc
+
+    async def _load_schedule(self) -> dict[date, DaySchedule]:
+        if self.snapshot_path is None:
+            return await self._fetch_schedule()
+
+        try:
+            schedule = await self._fetch_schedule()
+        except (aiohttp.ClientError, asyncio.TimeoutError, APIConnectionError) as exc:
+            if self._last_schedule is None:
+                raise
+            # raised rather than returned, so the stale schedule is neither cached nor taken for a fresh one
+            raise self._stale(f"Upstream is unavailable: {str(exc) or type(exc).__name__}") from exc
+
+        self._confirmed_at = time.monotonic()
+        if schedule is not self._last_schedule:
+            self._last_schedule = schedule
+            await asyncio.to_thread(self._persist, schedule)
+        return schedule
+
+    async def _fetch_schedule(self) -> dict[date, DaySchedule]:
+        if self.config.streaming:
+            schedule = await self._fetch_schedule_stream()
+            if not schedule:
+                raise ObjectNotFoundError("No data available")
+            return schedule
+
+        data = await self._fetch_schedule_data()
+
+        if data is None or not data.days:
+            raise ObjectNotFoundError("No data available")
+
+        # unchanged upstream (304) hands back the same payload object,
+        # reusing its parsed schedule keeps the service snapshot as well
+        if self._parsed is not None and self._parsed[0] is data:
+            return self._parsed[1]
+
+        schedule = parse_schedule(data)
+        self._parsed = (data, schedule)
+        return schedule
 
+    @handle_exceptions
+    async def get_schedule(self) -> dict[date, DaySchedule]:
+        """
+        returns all working days ordered by date,
+        upstream is requested and parsed at most once per cache ttl
+        """
+        return await self._get_cached_schedule()
 
-        date_str = day.isoformat()
-        day_id = None
-        for d in data['days']:
-            if d['date'] == date_str:
-                day_id = d['id']
-                break
-    
-        if day_id is None:
+    @handle_exceptions
+    async def refresh_schedule(self) -> dict[date, DaySchedule]:
+        """same as get_schedule, but ignores a cached payload which has not expired yet"""
+        self.cache.invalidate()
+        return await self._get_cached_schedule()
+
+    async def _get_day_schedule(self, day: date) -> DaySchedule:
+        schedule = await self.get_schedule()
+        if day not in schedule:
             raise ObjectNotFoundError(f"No such day in schedule {str(day)}")
+        return schedule[day]
 
-        timeslots_df = pd.DataFrame(data['timeslots'])
-        filtered_df = timeslots_df[timeslots_df['day_id'] == day_id][['start', 'end']]
-
-        time_intervals = [
-            TimeInterval(start=str_to_time(row['start']), end=str_to_time(row['end']))
-            for _, row in filtered_df.iterrows()
-        ]
-
-        return time_intervals
-
+    @handle_exceptions
+    async def get_day_timeslots(self, day: date) -> list[TimeInterval]:
+        return [timeslot.to_interval() for timeslot in (await self._get_day_schedule(day)).timeslots]
 
     @handle_exceptions
     async def get_day_interval(self, day: date) -> TimeInterval:
-        url = f"{self.config.host}:{self.config.port}/test-task/"
-        headers = {"accept": "application/json"}
-        data = await handle_get_request(url=url, headers=headers)
-    
-        if not data or 'days' not in data:
-            raise ObjectNotFoundError(f"No data available for date {day}")
-    
-        date_str = day.isoformat()
-    
-        for working_day in data['days']:
-            if working_day['date'] == date_str:
-                return TimeInterval(
-                    start=str_to_time(working_day['start']),
-                    end=str_to_time(working_day['end'])
-                )
-    
-        raise ObjectNotFoundError(f"No work hours found for date {day}")
+        return (await self._get_day_schedule(day)).working_hours.to_interval()
 
     @handle_exceptions
     async def get_available_days(self) -> List[date]:
-        url = f"{self.config.host}:{self.config.port}/test-task/"
-        headers = {"accept": "application/json"}
-        data = await handle_get_request(url=url, headers=headers)
-    
-        if not data or 'days' not in data:
-            raise ObjectNotFoundError(f"No data available")
-
-        days_df = pd.DataFrame(data['days'])
-        days_df['date'] = pd.to_datetime(days_df['date']).dt.date
-        unique_dates = days_df['date'].unique().tolist()
-        unique_dates.sort()
-        return unique_dates
+        return list(await self.get_schedule())
@@ -0,0 +1,53 @@
+"""
+SharedScheduleClient reading the schedule published by another process is defined here
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date
+from pathlib import Path
+
+from .exceptions import APIConnectionError, ObjectNotFoundError
+from .schedule_client import ScheduleClient
+from .snapshot_file import read_schedule_file
+from app.models import DaySchedule
+from app.utils import ApiConfig
+
+
+class SharedScheduleClient(ScheduleClient):
+    """
+    ScheduleClient for worker processes: instead of requesting upstream
+    it maps the snapshot file written by SchedulePublisher.
+    Every worker decodes the file into its own schedule objects, only the
+    upstream request and parsing are done once for all of them.
+
+    The file is checked at most once per cache ttl and read again only when
+    it was replaced, otherwise the very same schedule object is returned,
+    so ScheduleService keeps its built snapshot.
+    """
+
+    def __init__(self, api_config: ApiConfig, path: str | Path):
+        super().__init__(api_config)
+        self.path = Path(path)
+        self._loaded: tuple[tuple[int, int, int], dict[date, DaySchedule]] | None = None
+
+    def __str__(self):
+        return "SharedScheduleClient"
+
+    async def _load_schedule(self) -> dict[date, DaySchedule]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError as exc:
+            # the publisher has not reached the upstream yet, like a single worker would not
+            raise APIConnectionError(f"Schedule snapshot {self.path} is not published yet") from exc
+
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self._loaded is not None and self._loaded[0] == file_id:
+            return self._loaded[1]
+
+        schedule = read_schedule_file(self.path)
+        if not schedule:
+            raise ObjectNotFoundError("No data available")
+        self._loaded = (file_id, schedule)
+        return schedule
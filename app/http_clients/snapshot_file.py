@@ -0,0 +1,132 @@
+"""
+Binary schedule snapshot file is defined here.
+
+The file holds a parsed schedule in a columnar layout which is read back
+through a read-only memory map without any text parsing:
+
+    header        magic, format version, day and timeslot counts, crc32 of the body
+    ordinals      int32 per day, date.toordinal()
+    offsets       uint32 per day + 1, index of the day's first timeslot
+    working hours uint16 start, end per day, minutes since midnight
+    timeslots     uint16 start, end per timeslot, minutes since midnight
+
+Numbers are stored little-endian.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date
+from pathlib import Path
+
+from app.models import DaySchedule, MinuteInterval
+
+MAGIC = b"TCSS"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHxxIII")
+
+
+class SnapshotFileError(ValueError):
+    """Snapshot file is truncated, corrupted or written by another format version."""
+
+
+def _column(typecode: str, values) -> bytes:
+    column = array(typecode, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _read_column(buffer: memoryview, typecode: str, start: int, count: int) -> tuple[list[int], int]:
+    column = array(typecode)
+    end = start + count * column.itemsize
+    column.frombytes(buffer[start:end])
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tolist(), end
+
+
+def dump_schedule(schedule: dict[date, DaySchedule]) -> bytes:
+    days = list(schedule.values())
+    offsets = [0]
+    working_hours = []
+    timeslots = []
+    for day_schedule in days:
+        working_hours.extend(day_schedule.working_hours)
+        for timeslot in day_schedule.timeslots:
+            timeslots.extend(timeslot)
+        offsets.append(len(timeslots) // 2)
+
+    body = b"".join((
+        _column("i", [day_schedule.day.toordinal() for day_schedule in days]),
+        _column("I", offsets),
+        _column("H", working_hours),
+        _column("H", timeslots),
+    ))
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, len(days), offsets[-1], zlib.crc32(body)) + body
+
+
+def load_schedule(buffer) -> dict[date, DaySchedule]:
+    """reverse of dump_schedule, buffer is anything supporting the buffer protocol (bytes, mmap)"""
+    view = memoryview(buffer)
+    try:
+        return _load_schedule(view)
+    finally:
+        # an exception traceback must not keep the mmap exported
+        view.release()
+
+
+def _load_schedule(buffer: memoryview) -> dict[date, DaySchedule]:
+    if len(buffer) < _HEADER.size:
+        raise SnapshotFileError("Snapshot file is truncated")
+    magic, version, days_count, timeslots_count, checksum = _HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise SnapshotFileError(f"Unsupported snapshot file, magic {magic!r}, version {version}")
+    if zlib.crc32(buffer[_HEADER.size:]) != checksum:
+        raise SnapshotFileError("Snapshot file checksum mismatch")
+
+    ordinals, position = _read_column(buffer, "i", _HEADER.size, days_count)
+    offsets, position = _read_column(buffer, "I", position, days_count + 1)
+    working_hours, position = _read_column(buffer, "H", position, days_count * 2)
+    bounds, position = _read_column(buffer, "H", position, timeslots_count * 2)
+    if position != len(buffer):
+        raise SnapshotFileError("Snapshot file size does not match its header")
+
+    timeslots = list(map(MinuteInterval._make, zip(bounds[0::2], bounds[1::2])))
+    schedule = {}
+    for index, ordinal in enumerate(ordinals):
+        day = date.fromordinal(ordinal)
+        schedule[day] = DaySchedule(
+            day=day,
+            working_hours=MinuteInterval(working_hours[2 * index], working_hours[2 * index + 1]),
+            timeslots=tuple(timeslots[offsets[index]:offsets[index + 1]]),
+        )
+    return schedule
+
+
+def write_schedule_file(path: str | Path, schedule: dict[date, DaySchedule]) -> None:
+    """
+    writes into a temporary file which then replaces `path`, so readers
+    never see a partially written file and keep their old mapping valid
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as file:
+        file.write(dump_schedule(schedule))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def read_schedule_file(path: str | Path) -> dict[date, DaySchedule]:
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise SnapshotFileError("Snapshot file is empty")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return load_schedule(mapped)
@@ -2,32 +2,79 @@
 Core logic is defined here
 """
 
-from typing import List
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from typing import Iterator, List, TypeVar
 from datetime import date
 
+import structlog
+
 from app.http_clients import (
     ScheduleClient,
-    ObjectNotFoundError
+    ObjectNotFoundError,
+    StaleScheduleError,
+    check_deadline,
 )
-from app.models import TimeInterval, TimeSlot
+from app.models import DaySchedule, MinuteInterval, TimeInterval, TimeSlot
+from app.utils import REGISTRY
+
+from .bitmap import (
+    FULL_DAY,
+    bitmap_to_intervals,
+    intervals_to_bitmap,
+    range_mask,
+)
+from .coalescing import RequestCoalescer
+from .snapshot import BitmapDayIndex, DayIndex, ScheduleSnapshot, day_content_hash, schedule_version
+
+ENGINES = ("intervals", "bitmap")
+
+SNAPSHOT_DAYS = REGISTRY.counter(
+    "schedule_snapshot_days_total",
+    "Days of rebuilt schedule snapshots by whether their index was recomputed or reused",
+    ("result",),
+)
+
+# merging & gap search work on any interval with comparable start and end,
+# the snapshot uses MinuteInterval, TimeInterval is kept for the API
+Interval = TypeVar("Interval", TimeInterval, MinuteInterval)
 
 
 class ScheduleService:
 
     def __init__(
         self,
-        schedule_client: ScheduleClient
+        schedule_client: ScheduleClient,
+        engine: str = "intervals",
+        background_refresh: bool = False,
+        coalesce_requests: bool = False,
     ):
+        """
+        with `background_refresh` queries are answered from the last snapshot
+        loaded by `refresh` and never wait for the upstream themselves,
+        with `coalesce_requests` concurrent snapshot loads share one client call,
+        it only helps clients which do not share their loads already as ScheduleClient does
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown schedule engine {engine}, expected one of {ENGINES}")
         self.schedule_client = schedule_client
+        self.engine = engine
+        self.background_refresh = background_refresh
+        self.coalescer = RequestCoalescer() if coalesce_requests else None
+        self._snapshot: ScheduleSnapshot | None = None
+        self._snapshot_checked_at: float | None = None
 
 
-    def _merge_intervals(self, intervals: List[TimeInterval]) -> List[TimeInterval]:
+    def _merge_intervals(self, intervals: List[Interval]) -> List[Interval]:
         sorted_intervals = sorted(intervals, key=lambda x: x.start)
 
         merged = []
         if not sorted_intervals:
             return merged
 
+        interval_type = type(sorted_intervals[0])
         current_start = sorted_intervals[0].start
         current_end = sorted_intervals[0].end
 
@@ -36,65 +83,229 @@ class ScheduleService:
                 if slot.end > current_end:
                     current_end = slot.end
             else:
-                merged.append(TimeInterval(start=current_start, end=current_end))
+                merged.append(interval_type(start=current_start, end=current_end))
                 current_start = slot.start
                 current_end = slot.end
     
-        merged.append(TimeInterval(start=current_start, end=current_end))
+        merged.append(interval_type(start=current_start, end=current_end))
         return merged
  
 
     def _get_gaps_in_intervals(
         self, 
-        intervals: List[TimeInterval], 
-        time_range: TimeInterval
-    ) -> List[TimeInterval]:
+        intervals: List[Interval], 
+        time_range: Interval
+    ) -> List[Interval]:
+        interval_type = type(time_range)
         gaps = []
         prev_end = time_range.start
 
         for interval in intervals:
             if prev_end < interval.start:
-                gaps.append(TimeInterval(start=prev_end, end=interval.start))
+                gaps.append(interval_type(start=prev_end, end=interval.start))
             prev_end = interval.end
         if prev_end < time_range.end:
-            gaps.append(TimeInterval(start=prev_end, end=time_range.end))
+            gaps.append(interval_type(start=prev_end, end=time_range.end))
 
         return gaps
 
 
     def _is_interval_in_intervals(
         self,
-        current_interval: TimeInterval,
-        intervals: List[TimeInterval], 
+        current_interval: Interval,
+        intervals: List[Interval], 
     ):
         for interval in intervals:
             if interval.start <= current_interval.start and interval.end >= current_interval.end:
                 return True
         return False
 
-    async def get_busy_intervals(self, day: date) -> List[TimeInterval]:
-        time_intervals = await self.schedule_client.get_day_timeslots(day)
-        return self._merge_intervals(time_intervals)
+    def _build_day_index(self, day_schedule: DaySchedule) -> DayIndex:
+        busy_intervals = sorted(day_schedule.timeslots, key=lambda x: x.start)
+        merged_busy_intervals = self._merge_intervals(busy_intervals)
+        return DayIndex(
+            working_hours=day_schedule.working_hours,
+            busy_intervals=busy_intervals,
+            merged_busy_intervals=merged_busy_intervals,
+            free_intervals=self._get_gaps_in_intervals(merged_busy_intervals, day_schedule.working_hours),
+        )
+
+    def _build_bitmap_day_index(self, day_schedule: DaySchedule) -> BitmapDayIndex:
+        working_hours = day_schedule.working_hours
+        busy = intervals_to_bitmap(day_schedule.timeslots)
+        out_of_hours = FULL_DAY & ~range_mask(working_hours.start, working_hours.end)
+        blocked = busy | out_of_hours
+        return BitmapDayIndex(
+            working_hours=working_hours,
+            busy_intervals=sorted(day_schedule.timeslots, key=lambda x: x.start),
+            merged_busy_intervals=bitmap_to_intervals(busy),
+            free_intervals=bitmap_to_intervals(FULL_DAY & ~blocked),
+            blocked=blocked,
+        )
+
+    def _build_snapshot(
+        self,
+        schedule: dict[date, DaySchedule],
+        previous: ScheduleSnapshot | None = None,
+    ) -> ScheduleSnapshot:
+        """
+        only days whose content hash differs from the `previous` snapshot
+        go through merging and gap search, the rest of day indexes are reused
+        """
+        if self.engine == "bitmap":
+            build_day_index = self._build_bitmap_day_index
+        else:
+            build_day_index = self._build_day_index
+
+        previous_days = previous.days if previous is not None else {}
+        previous_hashes = previous.day_hashes if previous is not None else {}
+        days = {}
+        day_hashes = {}
+        reused = 0
+        for day, day_schedule in sorted(schedule.items()):
+            day_hash = day_content_hash(day_schedule)
+            day_hashes[day] = day_hash
+            if previous_hashes.get(day) == day_hash:
+                days[day] = previous_days[day]
+                reused += 1
+            else:
+                days[day] = build_day_index(day_schedule)
+
+        SNAPSHOT_DAYS.inc(len(days) - reused, result="changed")
+        SNAPSHOT_DAYS.inc(reused, result="reused")
+        return ScheduleSnapshot(
+            source=schedule,
+            days=days,
+            version=schedule_version(day_hashes),
+            day_hashes=day_hashes,
+            days_changed=len(days) - reused,
+            days_reused=reused,
+        )
+
+    def _update_snapshot(
+        self,
+        schedule: dict[date, DaySchedule],
+        confirmed_at: float | None = None,
+    ) -> ScheduleSnapshot:
+        """`confirmed_at` is when the upstream last confirmed a stale schedule, now by default"""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.source is not schedule:
+            # building a snapshot of a large schedule is not worth it for a caller who is gone
+            check_deadline()
+            snapshot = self._build_snapshot(schedule, previous=snapshot)
+            self._snapshot = snapshot
+        self._snapshot_checked_at = time.monotonic() if confirmed_at is None else confirmed_at
+        return snapshot
+
+    @property
+    def snapshot_age(self) -> float | None:
+        """seconds since the served snapshot was last confirmed by the upstream"""
+        if self._snapshot_checked_at is None:
+            return None
+        return time.monotonic() - self._snapshot_checked_at
 
+    async def get_snapshot(self) -> ScheduleSnapshot:
+        """
+        returns index of the current upstream schedule,
+        it is rebuilt only when the client hands out a new payload
+        """
+        if self.background_refresh and self._snapshot is not None:
+            return self._snapshot
+        check_deadline()
+        if self.coalescer is not None:
+            return await self.coalescer.run("snapshot", self._load_snapshot)
+        return await self._load_snapshot()
 
-    async def get_free_intervals(self, day: date) -> List[TimeInterval]:
-        busy_intervals = await self.get_busy_intervals(day)
-        day_interval = await self.schedule_client.get_day_interval(day)
-        return self._get_gaps_in_intervals(busy_intervals, day_interval)
+    async def _load_snapshot(self) -> ScheduleSnapshot:
+        try:
+            schedule = await self.schedule_client.get_schedule()
+        except StaleScheduleError as exc:
+            # upstream is down, the last known schedule is served with its real age
+            structlog.get_logger().warning("Upstream is unavailable, serving last known schedule", error=str(exc))
+            return self._update_snapshot(exc.schedule, confirmed_at=exc.confirmed_at)
+        return self._update_snapshot(schedule)
+
+    async def get_version(self) -> str:
+        """returns version of the current schedule without computing anything on it"""
+        return (await self.get_snapshot()).version
+
+    async def _resolve_snapshot(self, snapshot: ScheduleSnapshot | None) -> ScheduleSnapshot:
+        """
+        queries take the `snapshot` a caller already holds, e.g. the one its ETag was computed from,
+        so the answer cannot come from a schedule refreshed in between
+        """
+        if snapshot is not None:
+            return snapshot
+        return await self.get_snapshot()
+
+    async def refresh(self) -> ScheduleSnapshot:
+        """
+        reloads schedule from the upstream, on failure (StaleScheduleError included)
+        the previous snapshot stays in place and the error is raised
+        """
+        return self._update_snapshot(await self.schedule_client.refresh_schedule())
+
+    async def get_busy_intervals(self, day: date, snapshot: ScheduleSnapshot | None = None) -> List[MinuteInterval]:
+        return (await self._resolve_snapshot(snapshot)).get_day(day).merged_busy_intervals
+
+
+    async def get_free_intervals(self, day: date, snapshot: ScheduleSnapshot | None = None) -> List[MinuteInterval]:
+        return (await self._resolve_snapshot(snapshot)).get_day(day).free_intervals
+        
+
+    async def get_busy_intervals_range(
+        self, date_from: date, date_to: date, snapshot: ScheduleSnapshot | None = None
+    ) -> Iterator[tuple[date, List[MinuteInterval]]]:
+        """
+        returns lazy iterator over busy intervals of every working day in [date_from, date_to],
+        all of them are served from a single snapshot
+        """
+        snapshot = await self._resolve_snapshot(snapshot)
+        return ((day, day_index.merged_busy_intervals) for day, day_index in snapshot.iter_days(date_from, date_to))
+
+
+    async def get_free_intervals_range(
+        self, date_from: date, date_to: date, snapshot: ScheduleSnapshot | None = None
+    ) -> Iterator[tuple[date, List[MinuteInterval]]]:
+        snapshot = await self._resolve_snapshot(snapshot)
+        return ((day, day_index.free_intervals) for day, day_index in snapshot.iter_days(date_from, date_to))
         
 
-    async def is_slot_free(self, slot: TimeSlot) -> bool:
-        free_intervals = await self.get_free_intervals(slot.day)
-        return self._is_interval_in_intervals(current_interval=slot.interval, intervals=free_intervals)
+    async def is_slot_free(self, slot: TimeSlot, snapshot: ScheduleSnapshot | None = None) -> bool:
+        return (await self._resolve_snapshot(snapshot)).get_day(slot.day).is_free(MinuteInterval.from_interval(slot.interval))
         
 
-    async def find_free_slot(self, time_interval: TimeInterval):
-        available_days = await self.schedule_client.get_available_days()
-        for day in available_days:
-            free_intervals = await self.get_free_intervals(day)
-            if self._is_interval_in_intervals(
-                time_interval,
-                free_intervals
-            ):
-                return TimeSlot(day=day, interval=time_interval)
-        raise ObjectNotFoundError(f"No such free time interval {time_interval}")
+    async def are_slots_free(self, slots: List[TimeSlot], snapshot: ScheduleSnapshot | None = None) -> List[bool]:
+        """
+        answers is_slot_free for every slot with one snapshot lookup,
+        a day missing in the schedule fails the whole batch like it fails is_slot_free
+        """
+        snapshot = await self._resolve_snapshot(snapshot)
+
+        slots_by_day = defaultdict(list)
+        for index, slot in enumerate(slots):
+            slots_by_day[slot.day].append(index)
+
+        results = [False] * len(slots)
+        for day, indexes in slots_by_day.items():
+            day_results = snapshot.get_day(day).are_free([MinuteInterval.from_interval(slots[index].interval) for index in indexes])
+            for index, is_free in zip(indexes, day_results):
+                results[index] = is_free
+        return results
+
+
+    async def find_free_slots(
+        self, time_interval: TimeInterval, limit: int = 1, snapshot: ScheduleSnapshot | None = None
+    ) -> List[TimeSlot]:
+        snapshot = await self._resolve_snapshot(snapshot)
+        return [
+            TimeSlot(day=day, interval=time_interval)
+            for day in snapshot.find_free_days(MinuteInterval.from_interval(time_interval), limit)
+        ]
+
+
+    async def find_free_slot(self, time_interval: TimeInterval, snapshot: ScheduleSnapshot | None = None):
+        free_slots = await self.find_free_slots(time_interval, limit=1, snapshot=snapshot)
+        if not free_slots:
+            raise ObjectNotFoundError(f"No such free time interval {time_interval}")
+        return free_slots[0]
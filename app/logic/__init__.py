@@ -1 +1,5 @@
 from .ScheduleService import ScheduleService
+from .coalescing import RequestCoalescer
+from .snapshot import BitmapDayIndex, DayIndex, ScheduleSnapshot
+from .refresher import ScheduleRefresher
+from .publisher import SchedulePublisher, run_publisher
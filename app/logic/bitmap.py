@@ -0,0 +1,60 @@
+"""
+Minute-resolution occupancy bitmaps are defined here
+
+A day is stored as an int where bit `m` is set when minute [m, m+1) is occupied.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+from app.models import MinuteInterval
+
+MINUTES_PER_DAY = 24 * 60
+FULL_DAY = (1 << MINUTES_PER_DAY) - 1
+
+
+def range_mask(start: int, end: int) -> int:
+    """bitmap with minutes [start, end) set"""
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def intervals_to_bitmap(intervals: Iterable[MinuteInterval]) -> int:
+    bitmap = 0
+    for start, end in intervals:
+        bitmap |= range_mask(start, end)
+    return bitmap
+
+
+def iter_runs(bitmap: int) -> Iterator[tuple[int, int]]:
+    """yields (start, end) minutes of every run of set bits in ascending order"""
+    while bitmap:
+        start = (bitmap & -bitmap).bit_length() - 1
+        shifted = bitmap >> start
+        length = (~shifted & (shifted + 1)).bit_length() - 1
+        yield start, start + length
+        bitmap &= ~range_mask(start, start + length)
+
+
+def bitmap_to_intervals(bitmap: int) -> list[MinuteInterval]:
+    return [MinuteInterval(start, end) for start, end in iter_runs(bitmap)]
+
+
+def _is_minute_blocked(blocked: int, minute: int) -> bool:
+    if minute < 0 or minute >= MINUTES_PER_DAY:
+        return True
+    return bool(blocked >> minute & 1)
+
+
+def is_range_free(blocked: int, start: int, end: int) -> bool:
+    """
+    checks that [start, end] lies inside one free run of `blocked`,
+    an empty range is free unless it is strictly inside a blocked run
+    """
+    if start < end:
+        return not blocked & range_mask(start, end)
+    if start == end:
+        return not (_is_minute_blocked(blocked, start - 1) and _is_minute_blocked(blocked, start))
+    return False
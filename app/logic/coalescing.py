@@ -0,0 +1,45 @@
+"""
+Request coalescing for ScheduleService snapshot loads is defined here
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.http_clients import start_shared, wait_within_deadline
+from app.utils import REGISTRY
+
+COALESCED_REQUESTS = REGISTRY.counter(
+    "schedule_coalesced_requests_total",
+    "ScheduleService snapshot loads answered by an identical load in flight",
+)
+
+
+class RequestCoalescer:
+    """
+    Identical calls made while the first one is still running wait for its
+    result instead of repeating the work.
+
+    The call runs as a task of its own without a request deadline, so neither
+    the deadline nor cancellation of the caller who started it reach the others,
+    every caller waits only as long as its own deadline allows.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = start_shared(func(*args, **kwargs))
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.coalesced += 1
+            COALESCED_REQUESTS.inc()
+        return await wait_within_deadline(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
@@ -0,0 +1,75 @@
+"""
+Schedule publisher for multi-worker serving is defined here
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from pathlib import Path
+
+import structlog
+
+from app.http_clients import ScheduleClient, create_session, write_schedule_file
+from app.models import DaySchedule
+from app.utils import TestCaseApiConfig
+
+
+class SchedulePublisher:
+    """
+    Periodically fetches the upstream schedule and writes it into the snapshot
+    file mapped by SharedScheduleClient in every worker, so the upstream is
+    requested and parsed once no matter how many workers serve requests.
+    """
+
+    def __init__(self, schedule_client: ScheduleClient, path: str | Path, interval: float):
+        self.schedule_client = schedule_client
+        self.path = Path(path)
+        self.interval = interval
+        self.publications = 0
+        self.failures = 0
+        self._published: dict[date, DaySchedule] | None = None
+
+    async def publish(self) -> bool:
+        try:
+            schedule = await self.schedule_client.refresh_schedule()
+            # unchanged upstream hands back the same object, the file is left alone
+            if schedule is self._published:
+                return True
+            await asyncio.to_thread(write_schedule_file, self.path, schedule)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.failures += 1
+            structlog.get_logger().warning(
+                "schedule publication failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+                path=str(self.path),
+            )
+            return False
+        self._published = schedule
+        self.publications += 1
+        return True
+
+    async def run(self):
+        while True:
+            await self.publish()
+            await asyncio.sleep(self.interval)
+
+
+async def _publish_forever(config: TestCaseApiConfig):
+    session = create_session(config.schedule_config)
+    interval = config.service_config.refresh_interval or config.schedule_config.cache_ttl
+    publisher = SchedulePublisher(
+        ScheduleClient(config.schedule_config, session=session),
+        config.snapshot_config.path,
+        interval,
+    )
+    try:
+        await publisher.run()
+    finally:
+        await session.close()
+
+
+def run_publisher(config: TestCaseApiConfig):
+    """entrypoint of the publisher process"""
+    asyncio.run(_publish_forever(config))
@@ -0,0 +1,58 @@
+"""
+Background schedule refresher is defined here
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import structlog
+
+from .ScheduleService import ScheduleService
+
+
+class ScheduleRefresher:
+    """
+    Periodically reloads the upstream schedule into ScheduleService,
+    so that requests are served from memory regardless of upstream latency.
+    """
+
+    def __init__(self, schedule_service: ScheduleService, interval: float):
+        self.schedule_service = schedule_service
+        self.interval = interval
+        self.failures = 0
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self) -> bool:
+        try:
+            await self.schedule_service.refresh()
+        except Exception as exc:  # pylint: disable=broad-except
+            self.failures += 1
+            structlog.get_logger().warning(
+                "schedule refresh failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+                snapshot_age=self.schedule_service.snapshot_age,
+            )
+            return False
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh()
+
+    async def start(self):
+        """loads the first snapshot and starts polling"""
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,131 @@
+"""
+Precomputed schedule index is defined here
+"""
+
+from __future__ import annotations
+
+import hashlib
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Iterator
+
+from app.http_clients import ObjectNotFoundError
+from app.models import DaySchedule, MinuteInterval
+
+from .bitmap import is_range_free
+
+
+@dataclass(frozen=True)
+class DayIndex:
+    working_hours: MinuteInterval
+    busy_intervals: list[MinuteInterval]
+    merged_busy_intervals: list[MinuteInterval]
+    free_intervals: list[MinuteInterval]
+    _free_starts: list = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_free_starts", [interval.start for interval in self.free_intervals])
+
+    def is_free(self, interval: MinuteInterval) -> bool:
+        # free intervals are sorted and disjoint, so only the last one
+        # starting before the interval can contain it
+        position = bisect_right(self._free_starts, interval.start)
+        return position > 0 and self.free_intervals[position - 1].end >= interval.end
+
+    def are_free(self, intervals: list[MinuteInterval]) -> list[bool]:
+        """
+        answers is_free for every interval in a single sorted sweep over free intervals,
+        results follow the order of `intervals`
+        """
+        results = [False] * len(intervals)
+        free_intervals = self.free_intervals
+        position = -1
+        for index in sorted(range(len(intervals)), key=lambda i: intervals[i].start):
+            interval = intervals[index]
+            while position + 1 < len(free_intervals) and free_intervals[position + 1].start <= interval.start:
+                position += 1
+            results[index] = position >= 0 and free_intervals[position].end >= interval.end
+        return results
+
+
+@dataclass(frozen=True)
+class BitmapDayIndex(DayIndex):
+    """
+    DayIndex of the "bitmap" engine, `blocked` has a bit set for every minute
+    which is either busy or out of working hours
+    """
+
+    blocked: int = 0
+
+    def are_free(self, intervals: list[MinuteInterval]) -> list[bool]:
+        return [self.is_free(interval) for interval in intervals]
+
+    def is_free(self, interval: MinuteInterval) -> bool:
+        return is_range_free(self.blocked, interval.start, interval.end)
+
+
+@dataclass(frozen=True)
+class ScheduleSnapshot:
+    """
+    Everything ScheduleService answers with, computed once per upstream payload.
+
+    `source` is the parsed payload the snapshot was built from, it is used
+    to tell whether the snapshot is still up to date. `days` are ordered by date.
+    `version` is a content hash of the schedule, equal schedules share it
+    across payloads and processes. `day_hashes` are content hashes of every day,
+    days whose hash did not change are taken over from the previous snapshot,
+    `days_changed` and `days_reused` tell how many days were built and taken over.
+    """
+
+    source: Any
+    days: dict[date, DayIndex]
+    version: str
+    day_hashes: dict[date, bytes] = field(default_factory=dict, repr=False, compare=False)
+    days_changed: int = 0
+    days_reused: int = 0
+    _dates: list = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_dates", list(self.days))
+
+    def get_day(self, day: date) -> DayIndex:
+        try:
+            return self.days[day]
+        except KeyError:
+            raise ObjectNotFoundError(f"No such day in schedule {str(day)}") from None
+
+    def iter_days(self, date_from: date, date_to: date) -> Iterator[tuple[date, DayIndex]]:
+        """yields working days within [date_from, date_to] ordered by date"""
+        for position in range(bisect_left(self._dates, date_from), len(self._dates)):
+            day = self._dates[position]
+            if day > date_to:
+                break
+            yield day, self.days[day]
+
+    def find_free_days(self, interval: MinuteInterval, limit: int = 1) -> list[date]:
+        """returns up to `limit` earliest days where `interval` is free"""
+        found = []
+        for day, day_index in self.days.items():
+            if day_index.is_free(interval):
+                found.append(day)
+                if len(found) >= limit:
+                    break
+        return found
+
+
+def day_content_hash(day_schedule: DaySchedule) -> bytes:
+    """hash of working hours and timeslots of a day, in the order they came from upstream"""
+    bounds = array("H", day_schedule.working_hours)
+    for timeslot in day_schedule.timeslots:
+        bounds.extend(timeslot)
+    return hashlib.blake2b(bounds.tobytes(), digest_size=16).digest()
+
+
+def schedule_version(day_hashes: dict[date, bytes]) -> str:
+    digest = hashlib.blake2b(digest_size=8)
+    for day in sorted(day_hashes):
+        digest.update(day.isoformat().encode())
+        digest.update(day_hashes[day])
+    return digest.hexdigest()
@@ -1 +1,4 @@
+from .deadline import DeadlineMiddleware
 from .exception_handler import ExceptionHandlerMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
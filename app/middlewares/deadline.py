@@ -0,0 +1,52 @@
+"""Request deadline middleware is defined here."""
+
+from __future__ import annotations
+
+import math
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.http_clients import reset_deadline, set_deadline
+
+
+class DeadlineMiddleware:
+    """
+    This pure ASGI middleware starts the time budget of every request,
+    it is `timeout` seconds or less if the client sends a shorter one in `header`.
+    The budget is carried by a contextvar, upstream calls get what is left of it
+    as their timeout and the work stops with 504 once it is spent.
+    """
+
+    def __init__(self, app: ASGIApp, timeout: float, header: str):
+        self.app = app
+        self._timeout = timeout if timeout > 0 else None
+        self._header = header.lower().encode("latin-1")
+
+    def _requested_timeout(self, scope: Scope) -> float | None:
+        for name, value in scope["headers"]:
+            if name == self._header:
+                try:
+                    timeout = float(value)
+                except ValueError:
+                    return None
+                return timeout if math.isfinite(timeout) and timeout > 0 else None
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout = self._timeout
+        requested = self._requested_timeout(scope)
+        if requested is not None and (timeout is None or requested < timeout):
+            timeout = requested
+        if timeout is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = set_deadline(timeout)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_deadline(token)
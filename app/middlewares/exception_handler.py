@@ -4,9 +4,8 @@ import itertools
 import traceback
 
 import structlog
-from fastapi import Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.http_clients import (
     APIConnectionError,
@@ -19,77 +18,108 @@ from app.schemas import (
     TimeoutErrorResponse,
     ObjectNotFoundResponse
 )
+from app.utils import REGISTRY
 
+logger = structlog.get_logger()
 
-class ExceptionHandlerMiddleware(BaseHTTPMiddleware):
+EXCEPTIONS_TOTAL = REGISTRY.counter(
+    "http_exceptions_total",
+    "Exceptions caught by ExceptionHandlerMiddleware by exception type",
+    ("type",),
+)
+
+
+class ExceptionHandlerMiddleware:
     """
-    This fastapi middleware is used to catch either the low python exceptions
+    This pure ASGI middleware is used to catch either the low python exceptions
     or the http_client's ones and make valid returns for unexpected situations
-    such as lost connection
+    such as lost connection.
+
+    Successful requests only pass through a `send` wrapper, everything else
+    (logging, formatting, tracebacks) happens once an exception is caught.
     """
 
-    def __init__(self, app, debug: bool):
+    def __init__(self, app: ASGIApp, debug: bool):
         """
         Passing debug as a list with single element is a hack to be able to change the value
         on the application startup.
         """
-        super().__init__(app)
+        self.app = app
         self._debug = debug
 
-    async def dispatch(self, request: Request, call_next):
-        logger = structlog.get_logger()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def _send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
+            await self.app(scope, receive, _send)
+        except Exception as exc:  # pylint: disable=broad-except
+            EXCEPTIONS_TOTAL.inc(type=type(exc).__name__)
+            if response_started:
+                raise
+            response = self._handle_exception(scope, exc)
+            await response(scope, receive, send)
 
-        except APIConnectionError as exc:
-            logger.error(f"status: 502, detail: {{content: Couldn't connect to upstream server, info: { {str(exc)} }")
+    def _handle_exception(self, scope: Scope, exc: Exception) -> JSONResponse:
+        if isinstance(exc, APIConnectionError):
+            logger.error("Couldn't connect to upstream server", status=502, info=str(exc))
             return JSONResponse(
                 content=GatewayErrorResponse(
                     detail=f"Couldn't connect to upstream server, info: { {str(exc)} }"
-                ).dict(),
+                ).model_dump(),
                 status_code=502,
             )
 
-        except APITimeoutError as exc:
-            logger.error(
-                f"status: 504, detail: {{content: Didn't receive a timely response from upstream server, info: {str(exc)}}}"
-            )
+        if isinstance(exc, APITimeoutError):
+            logger.error("Didn't receive a timely response from upstream server", status=504, info=str(exc))
             return JSONResponse(
                 content=TimeoutErrorResponse(
                     detail=f"Didn't receive a timely response from upstream server, info: {str(exc)}"
-                ).dict(),
+                ).model_dump(),
                 status_code=504,
             )
 
-        except ObjectNotFoundError as exc:
+        if isinstance(exc, ObjectNotFoundError):
             logger.error(
-                f"status: 404, detail: {{ "
-                f"content: Given object or its data is not found, "
-                f"therefore further calculations are impossible, "
-                f"info: {str(exc)}}}"
+                "Given object or its data is not found, therefore further calculations are impossible",
+                status=404,
+                info=str(exc),
             )
             return JSONResponse(
                 content=ObjectNotFoundResponse(
                     detail=f"couldn't find object or its data, detail: {{ {str(exc)} }}"
-                ).dict(),
+                ).model_dump(),
                 status_code=404
             )
 
-        except Exception as exc:  # pylint: disable=broad-except
-            trace = list(
-                itertools.chain.from_iterable(map(lambda x: x.split("\n"), traceback.format_tb(exc.__traceback__)))
-            )
+        trace = list(
+            itertools.chain.from_iterable(map(lambda x: x.split("\n"), traceback.format_tb(exc.__traceback__)))
+        )
 
-            logger.error(
-                f"status: 500, error: {str(exc)}, error_type: {str(type(exc))}, path: {request.url.query}, trace: {trace}"
-            )
+        logger.error(
+            "Unhandled exception",
+            status=500,
+            error=str(exc),
+            error_type=str(type(exc)),
+            path=scope.get("query_string", b"").decode("latin-1"),
+            trace=trace,
+        )
 
-            if self._debug:
-                return JSONResponse(
-                    content=ErrorResponse(
-                        error=str(exc), error_type=str(type(exc)), path=request.url.path, trace=" ".join(trace)
-                    ).dict(),
-                    status_code=500,
-                )
+        if self._debug:
+            return JSONResponse(
+                content=ErrorResponse(
+                    error=str(exc), error_type=str(type(exc)), path=scope["path"], trace=" ".join(trace)
+                ).model_dump(),
+                status_code=500,
+            )
 
-            return JSONResponse(content=ErrorResponse().dict(), status_code=500)
+        return JSONResponse(content=ErrorResponse().model_dump(), status_code=500)
@@ -0,0 +1,50 @@
+"""Request metrics middleware is defined here."""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils import REGISTRY
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time spent serving a request, including streamed bodies",
+    ("method", "route", "status"),
+)
+
+
+class MetricsMiddleware:
+    """
+    This pure ASGI middleware records request latency per route template
+    (e.g. `/schedule/free_slots`), so query strings and path parameters
+    do not multiply label values. Requests which matched no route share
+    the `unmatched` label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def _send(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=str(status),
+            )
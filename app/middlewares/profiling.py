@@ -0,0 +1,73 @@
+"""Per-request profiling middleware is defined here."""
+
+import cProfile
+import os
+import time
+import uuid
+
+import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = structlog.get_logger()
+
+REPORT_HEADER = b"x-profile-report"
+
+
+class ProfilingMiddleware:
+    """
+    This pure ASGI middleware runs requests carrying the trigger header
+    under cProfile and writes a pstats file per request to `directory`,
+    its name is returned in the `X-Profile-Report` response header.
+
+    Open a report with `python -m pstats <file>` or snakeviz.
+
+    cProfile follows the whole event loop thread, so work of requests served
+    concurrently with a profiled one shows up in its report as well.
+    Only one request is profiled at a time, others carrying the header are
+    served as usual.
+
+    The middleware is added only when profiling is enabled in config,
+    so disabled profiling costs nothing.
+    """
+
+    def __init__(self, app: ASGIApp, header: str, directory: str):
+        self.app = app
+        self._header = header.lower().encode("latin-1")
+        self._directory = directory
+        self._active = False
+
+    def _is_requested(self, scope: Scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self._header:
+                return value.strip().lower() not in (b"", b"0", b"false")
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self._active or not self._is_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        report = os.path.join(
+            self._directory,
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.prof",
+        )
+
+        async def _send(message: Message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (REPORT_HEADER, report.encode("latin-1"))],
+                }
+            await send(message)
+
+        self._active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            profiler.disable()
+            self._active = False
+            os.makedirs(self._directory, exist_ok=True)
+            profiler.dump_stats(report)
+            logger.info("Request profiled", path=scope["path"], report=report)
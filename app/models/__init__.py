@@ -1 +1 @@
-from .schedule import TimeInterval, TimeSlot
+from .schedule import DaySchedule, MinuteInterval, TimeInterval, TimeSlot
@@ -4,9 +4,17 @@ Models are defined here
 
 from dataclasses import dataclass
 from datetime import time, date
+from typing import NamedTuple
 
 from app.schemas import TimeIntervalSchema, TimeSlotSchema
-from app.utils import time_to_str, str_to_time
+from app.utils import (
+    minutes_to_str,
+    minutes_to_time,
+    str_to_minutes,
+    str_to_time,
+    time_to_minutes,
+    time_to_str,
+)
 
 
 @dataclass(frozen=True)
@@ -28,6 +36,30 @@ class TimeInterval:
         )
 
 
+class MinuteInterval(NamedTuple):
+    """
+    Compact TimeInterval used inside the schedule index,
+    start and end are minutes since midnight.
+    """
+
+    start: int
+    end: int
+
+    @classmethod
+    def from_interval(cls, interval: TimeInterval) -> "MinuteInterval":
+        return cls(time_to_minutes(interval.start), time_to_minutes(interval.end))
+
+    def to_interval(self) -> TimeInterval:
+        return TimeInterval(start=minutes_to_time(self.start), end=minutes_to_time(self.end))
+
+    @classmethod
+    def from_schema(cls, schema: TimeIntervalSchema) -> "MinuteInterval":
+        return cls(str_to_minutes(schema.start), str_to_minutes(schema.end))
+
+    def to_schema(self) -> TimeIntervalSchema:
+        return TimeIntervalSchema(start=minutes_to_str(self.start), end=minutes_to_str(self.end))
+
+
 @dataclass(frozen=True)
 class TimeSlot:
     day: date
@@ -48,3 +80,10 @@ class TimeSlot:
             end=time_to_str(self.interval.end),
             day=self.day
         )
+
+
+@dataclass(frozen=True)
+class DaySchedule:
+    day: date
+    working_hours: MinuteInterval
+    timeslots: tuple[MinuteInterval, ...]
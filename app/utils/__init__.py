@@ -3,6 +3,12 @@
 from .config import (
     ApiConfig,
     AppConfig,
-    TestCaseApiConfig
+    ProfilingConfig,
+    ServiceConfig,
+    SnapshotConfig,
+    TestCaseApiConfig,
+    get_config_path,
 )
 from .utils import *
+from .serialization import HAS_ORJSON, json_dumps, json_loads
+from .metrics import LATENCY_BUCKETS, REGISTRY, SIZE_BUCKETS, Counter, Gauge, Histogram, MetricsRegistry
@@ -2,31 +2,111 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TextIO
 
 import yaml
 
 
+def get_config_path() -> str:
+    """config.yaml unless CONFIG_PATH environment variable points elsewhere"""
+    return os.environ.get("CONFIG_PATH", "config.yaml")
+
+
 @dataclass
 class AppConfig:
+    """
+    workers > 1 runs that many uvicorn workers next to one publisher process
+    requesting the upstream, see SnapshotConfig,
+    request_timeout > 0 gives every request that many seconds,
+    a client may shorten its own budget with deadline_header (seconds)
+    """
+
     host: str
     port: int
+    cache_max_age: int = 5
+    workers: int = 1
+    request_timeout: float = 0.0
+    deadline_header: str = "X-Request-Timeout"
 
 
 @dataclass
 class ApiConfig:
-    """defaut api config"""
+    """
+    defaut api config,
+    hedge_quantile > 0 sends a second request once the first one is slower than that
+    quantile of recent latencies (clamped to hedge_min_delay..hedge_max_delay)
+    for at most hedge_budget share of requests,
+    breaker_failure_threshold > 0 fails requests fast after that many consecutive
+    upstream failures, for breaker_reset_timeout seconds,
+    upstream_timeout > 0 gives up on an upstream attempt after that many seconds,
+    which counts as an upstream failure
+    """
 
     host: str
     port: int
+    cache_ttl: float = 5.0
+    connection_limit: int = 100
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: int = 300
+    streaming: bool = False
+    hedge_quantile: float = 0.0
+    hedge_min_delay: float = 0.05
+    hedge_max_delay: float = 1.0
+    hedge_budget: float = 0.1
+    breaker_failure_threshold: int = 0
+    breaker_reset_timeout: float = 30.0
+    upstream_timeout: float = 10.0
+
+
+@dataclass
+class ServiceConfig:
+    """
+    schedule service config, engine is either `intervals` or `bitmap`,
+    refresh_interval > 0 enables background schedule refresh every given seconds,
+    coalesce_requests makes concurrent snapshot loads share one schedule client call
+    """
+
+    engine: str = "intervals"
+    refresh_interval: float = 0.0
+    coalesce_requests: bool = False
+
+
+@dataclass
+class ProfilingConfig:
+    """
+    with enabled profiling requests carrying `header` are run under cProfile,
+    reports are written to `directory`
+    """
+
+    enabled: bool = False
+    header: str = "X-Profile"
+    directory: str = "profiles"
+
+
+@dataclass
+class SnapshotConfig:
+    """
+    path of the binary schedule snapshot file,
+    with several workers it is written by the publisher process and mapped by workers,
+    the file saves every worker the upstream request and parsing, but each worker
+    still decodes it into its own schedule and index, so memory grows with workers,
+    with persist a single process keeps it to start warm and to serve during upstream outages
+    """
+
+    path: str = "schedule.snapshot"
+    persist: bool = False
 
 
 @dataclass
 class TestCaseApiConfig:
     app: AppConfig
     schedule_config: ApiConfig
+    service_config: ServiceConfig = field(default_factory=ServiceConfig)
+    profiling_config: ProfilingConfig = field(default_factory=ProfilingConfig)
+    snapshot_config: SnapshotConfig = field(default_factory=SnapshotConfig)
 
     @classmethod
     def load(cls, file: str | Path | TextIO) -> "TestCaseApiConfig":
@@ -42,6 +122,9 @@ class TestCaseApiConfig:
             return cls(
                 app=AppConfig(**data.get("app", {})),
                 schedule_config=ApiConfig(**data.get("schedule_client", {})),
+                service_config=ServiceConfig(**data.get("schedule_service", {})),
+                profiling_config=ProfilingConfig(**data.get("profiling", {})),
+                snapshot_config=SnapshotConfig(**data.get("snapshot", {})),
             )
         except Exception as exc:
             raise ValueError(f"Could not read app config file: {file}") from exc
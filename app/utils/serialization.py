@@ -0,0 +1,35 @@
+"""
+JSON encoding & decoding is defined here
+
+orjson is used when it is installed, otherwise stdlib json.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+if orjson is not None:
+
+    def json_loads(data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+    def json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+else:
+
+    def json_loads(data: bytes | str) -> Any:
+        return json.loads(data)
+
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+HAS_ORJSON = orjson is not None
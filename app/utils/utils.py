@@ -7,3 +7,16 @@ def str_to_time(time_str: str) -> time:
 def time_to_str(t: time) -> str:
     return t.strftime("%H:%M")
 
+def time_to_minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+def minutes_to_time(minutes: int) -> time:
+    return time(hour=minutes // 60, minute=minutes % 60)
+
+def str_to_minutes(time_str: str) -> int:
+    hours, minutes = map(int, time_str.split(':'))
+    return hours * 60 + minutes
+
+def minutes_to_str(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
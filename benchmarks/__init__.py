@@ -0,0 +1,6 @@
+"""
+Performance benchmarks are defined here, they are not part of the test suite.
+
+run:
+    python -m benchmarks.<module>
+"""
@@ -0,0 +1,78 @@
+"""
+Compares datetime.time based TimeInterval against integer-minute MinuteInterval:
+memory held by a list of intervals and merge + gaps throughput.
+
+run:
+    python -m benchmarks.bench_intervals
+"""
+
+from __future__ import annotations
+
+import random
+import timeit
+import tracemalloc
+
+from app.logic.ScheduleService import ScheduleService
+from app.models import MinuteInterval, TimeInterval
+
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def random_minutes(count: int, seed: int = 0) -> list[tuple[int, int]]:
+    rnd = random.Random(seed)
+    result = []
+    for _ in range(count):
+        start = rnd.randrange(0, 24 * 60 - 2)
+        result.append((start, rnd.randrange(start + 1, min(start + 120, 24 * 60 - 1) + 1)))
+    return result
+
+
+def allocated(factory) -> int:
+    """bytes still allocated after factory() returns its result"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = factory()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+SERVICE = ScheduleService(schedule_client=None)
+
+
+def merge_and_gaps(intervals, working_hours):
+    return SERVICE._get_gaps_in_intervals(SERVICE._merge_intervals(intervals), working_hours)
+
+
+def main():
+    print(
+        f"{'intervals':>10} {'time, B/iv':>11} {'minutes, B/iv':>14} "
+        f"{'time, s':>9} {'minutes, s':>11} {'speedup':>8}"
+    )
+    day_minutes = MinuteInterval(0, 24 * 60 - 1)
+    day_time = day_minutes.to_interval()
+
+    for count in SIZES:
+        raw = random_minutes(count)
+        minute_intervals = [MinuteInterval(start, end) for start, end in raw]
+        time_intervals = [interval.to_interval() for interval in minute_intervals]
+        assert [
+            MinuteInterval.from_interval(gap) for gap in merge_and_gaps(time_intervals, day_time)
+        ] == merge_and_gaps(minute_intervals, day_minutes)
+
+        # time objects are built per interval as the parser used to do
+        time_memory = allocated(lambda: [MinuteInterval(start, end).to_interval() for start, end in raw])
+        minute_memory = allocated(lambda: [MinuteInterval(start, end) for start, end in raw])
+
+        time_seconds = min(timeit.repeat(lambda: merge_and_gaps(time_intervals, day_time), number=5, repeat=3))
+        minute_seconds = min(timeit.repeat(lambda: merge_and_gaps(minute_intervals, day_minutes), number=5, repeat=3))
+        print(
+            f"{count:>10} {time_memory / count:>11.1f} {minute_memory / count:>14.1f} "
+            f"{time_seconds:>9.4f} {minute_seconds:>11.4f} {time_seconds / minute_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compares the whole decode + parse pipeline for multi-megabyte /test-task/ bodies:
+the previous one, stdlib json into dicts (as aiohttp's response.json() does)
+and parse_schedule over those dicts, kept below verbatim up to the minutes model,
+against decode_schedule_payload + parse_schedule with orjson and with the stdlib fallback.
+Encoding of our responses is compared as well.
+
+run:
+    python -m benchmarks.bench_json
+"""
+
+from __future__ import annotations
+
+import json
+import timeit
+from collections import defaultdict
+from datetime import date
+from unittest.mock import patch
+
+from app.http_clients import decode_schedule_payload, parse_schedule
+from app.models import DaySchedule, MinuteInterval
+from app.utils import HAS_ORJSON, json_dumps, str_to_minutes
+
+from .synthetic import generate_payload
+
+SIZES = [(365, 20_000), (1_000, 100_000), (3_000, 300_000)]
+
+
+def previous_parse_schedule(data: dict) -> dict[date, DaySchedule]:
+    timeslots = data.get('timeslots') or []
+    day_ids = [timeslot['day_id'] for timeslot in timeslots]
+    starts = [timeslot['start'] for timeslot in timeslots]
+    ends = [timeslot['end'] for timeslot in timeslots]
+
+    days = data['days']
+    raw_times = {*starts, *ends}
+    raw_times.update(working_day['start'] for working_day in days)
+    raw_times.update(working_day['end'] for working_day in days)
+    times = {value: str_to_minutes(value) for value in raw_times}
+
+    timeslots_by_day = defaultdict(list)
+    for day_id, start, end in zip(day_ids, starts, ends):
+        timeslots_by_day[day_id].append(MinuteInterval(times[start], times[end]))
+
+    schedule = {}
+    for working_day in sorted(days, key=lambda d: d['date']):
+        day = date.fromisoformat(working_day['date'])
+        schedule[day] = DaySchedule(
+            day=day,
+            working_hours=MinuteInterval(times[working_day['start']], times[working_day['end']]),
+            timeslots=tuple(timeslots_by_day.get(working_day['id'], ())),
+        )
+    return schedule
+
+
+def _best(func) -> float:
+    return min(timeit.repeat(func, number=1, repeat=5))
+
+
+def main():
+    print(f"orjson installed: {HAS_ORJSON}")
+    print(
+        f"{'MB':>6} {'json.loads, s':>14} {'previous, s':>12} "
+        f"{'decode, s':>10} {'decode+parse, s':>16} {'stdlib decode+parse, s':>23}"
+    )
+    for days, timeslots in SIZES:
+        body = json.dumps(generate_payload(days, timeslots)).encode()
+        assert parse_schedule(decode_schedule_payload(body)) == previous_parse_schedule(json.loads(body))
+
+        stdlib_time = _best(lambda: json.loads(body))
+        previous_time = _best(lambda: previous_parse_schedule(json.loads(body)))
+        decode_time = _best(lambda: decode_schedule_payload(body))
+        full_time = _best(lambda: parse_schedule(decode_schedule_payload(body)))
+        with patch("app.http_clients.parsers.json_loads", json.loads):
+            fallback_time = _best(lambda: parse_schedule(decode_schedule_payload(body)))
+        print(
+            f"{len(body) / 2 ** 20:>6.1f} {stdlib_time:>14.4f} {previous_time:>12.4f} "
+            f"{decode_time:>10.4f} {full_time:>16.4f} {fallback_time:>23.4f}"
+        )
+
+    response = [{"start": f"{hour:02d}:00", "end": f"{hour:02d}:30"} for hour in range(24)] * 100
+    stdlib_dump = _best(lambda: json.dumps(response).encode())
+    fast_dump = _best(lambda: json_dumps(response))
+    print(f"response encoding: json.dumps {stdlib_dump * 1e3:.3f} ms, json_dumps {fast_dump * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
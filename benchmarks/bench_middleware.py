@@ -0,0 +1,178 @@
+"""
+Compares request throughput of the pure ASGI ExceptionHandlerMiddleware
+against its previous BaseHTTPMiddleware implementation, kept below verbatim,
+on a successful request and on one answered with 404.
+
+Requests are sent straight into the ASGI app, so the numbers contain no network.
+Log records of both implementations are dropped, only their construction is measured.
+
+run:
+    python -m benchmarks.bench_middleware
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+import traceback
+
+import structlog
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.http_clients import (
+    APIConnectionError,
+    APITimeoutError,
+    ObjectNotFoundError,
+)
+from app.middlewares import ExceptionHandlerMiddleware
+from app.schemas import (
+    ErrorResponse,
+    GatewayErrorResponse,
+    TimeoutErrorResponse,
+    ObjectNotFoundResponse
+)
+
+REQUESTS = 20_000
+
+
+class PreviousExceptionHandlerMiddleware(BaseHTTPMiddleware):
+    """
+    This fastapi middleware is used to catch either the low python exceptions
+    or the http_client's ones and make valid returns for unexpected situations
+    such as lost connection
+    """
+
+    def __init__(self, app, debug: bool):
+        """
+        Passing debug as a list with single element is a hack to be able to change the value
+        on the application startup.
+        """
+        super().__init__(app)
+        self._debug = debug
+
+    async def dispatch(self, request: Request, call_next):
+        logger = structlog.get_logger()
+        try:
+            return await call_next(request)
+
+        except APIConnectionError as exc:
+            logger.error(f"status: 502, detail: {{content: Couldn't connect to upstream server, info: { {str(exc)} }")
+            return JSONResponse(
+                content=GatewayErrorResponse(
+                    detail=f"Couldn't connect to upstream server, info: { {str(exc)} }"
+                ).dict(),
+                status_code=502,
+            )
+
+        except APITimeoutError as exc:
+            logger.error(
+                f"status: 504, detail: {{content: Didn't receive a timely response from upstream server, info: {str(exc)}}}"
+            )
+            return JSONResponse(
+                content=TimeoutErrorResponse(
+                    detail=f"Didn't receive a timely response from upstream server, info: {str(exc)}"
+                ).dict(),
+                status_code=504,
+            )
+
+        except ObjectNotFoundError as exc:
+            logger.error(
+                f"status: 404, detail: {{ "
+                f"content: Given object or its data is not found, "
+                f"therefore further calculations are impossible, "
+                f"info: {str(exc)}}}"
+            )
+            return JSONResponse(
+                content=ObjectNotFoundResponse(
+                    detail=f"couldn't find object or its data, detail: {{ {str(exc)} }}"
+                ).dict(),
+                status_code=404
+            )
+
+        except Exception as exc:  # pylint: disable=broad-except
+            trace = list(
+                itertools.chain.from_iterable(map(lambda x: x.split("\n"), traceback.format_tb(exc.__traceback__)))
+            )
+
+            logger.error(
+                f"status: 500, error: {str(exc)}, error_type: {str(type(exc))}, path: {request.url.query}, trace: {trace}"
+            )
+
+            if self._debug:
+                return JSONResponse(
+                    content=ErrorResponse(
+                        error=str(exc), error_type=str(type(exc)), path=request.url.path, trace=" ".join(trace)
+                    ).dict(),
+                    status_code=500,
+                )
+
+            return JSONResponse(content=ErrorResponse().dict(), status_code=500)
+
+
+def make_app(middleware: type | None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/schedule/free_slots")
+    async def free_slots():
+        return [{"start": "09:00", "end": "18:00"}]
+
+    @app.get("/schedule/busy_slots")
+    async def busy_slots():
+        raise ObjectNotFoundError("No such day in schedule 2024-10-12")
+
+    if middleware is not None:
+        app.add_middleware(middleware, debug=False)
+    return app
+
+
+async def _drive(app: FastAPI, path: str, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started
+
+
+def main():
+    structlog.configure(logger_factory=structlog.ReturnLoggerFactory())
+
+    middlewares = [
+        ("previous", PreviousExceptionHandlerMiddleware),
+        ("pure ASGI", ExceptionHandlerMiddleware),
+    ]
+    for title, path in [("200 OK", "/schedule/free_slots"), ("404 Not Found", "/schedule/busy_slots")]:
+        print(title)
+        results = {}
+        for name, middleware in middlewares:
+            elapsed = asyncio.run(_drive(make_app(middleware), path, REQUESTS))
+            results[name] = REQUESTS / elapsed
+            print(f"{name:>20}: {results[name]:>9.0f} req/s")
+        print(f"{'speedup':>20}: {results['pure ASGI'] / results['previous']:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares columnar payload parser against the former pandas based one.
+
+run:
+    python -m benchmarks.bench_parser
+"""
+
+from __future__ import annotations
+
+import timeit
+
+import pandas as pd
+
+from app.http_clients import decode_schedule_payload, parse_schedule
+from app.utils import json_dumps
+from app.models import DaySchedule, MinuteInterval, TimeInterval
+from app.utils import str_to_time
+
+from .synthetic import generate_payload
+
+
+def parse_schedule_pandas(data: dict) -> dict:
+    """parsing as it was done by ScheduleClient before parse_schedule"""
+    timeslots_df = pd.DataFrame(data.get('timeslots', []), columns=['day_id', 'start', 'end'])
+    timeslots_by_day = {
+        day_id: tuple(
+            MinuteInterval.from_interval(TimeInterval(start=str_to_time(row['start']), end=str_to_time(row['end'])))
+            for _, row in group.iterrows()
+        )
+        for day_id, group in timeslots_df.groupby('day_id')
+    }
+
+    days_df = pd.DataFrame(data['days'])
+    days_df['date'] = pd.to_datetime(days_df['date']).dt.date
+    days_df = days_df.sort_values('date')
+
+    return {
+        row['date']: DaySchedule(
+            day=row['date'],
+            working_hours=MinuteInterval.from_interval(
+                TimeInterval(start=str_to_time(row['start']), end=str_to_time(row['end']))
+            ),
+            timeslots=timeslots_by_day.get(row['id'], ()),
+        )
+        for _, row in days_df.iterrows()
+    }
+
+
+SIZES = [(30, 1_000), (365, 10_000), (1_000, 100_000)]
+
+
+def main():
+    print(f"{'days':>6} {'timeslots':>10} {'pandas, s':>10} {'columnar, s':>12} {'speedup':>8}")
+    for days, timeslots in SIZES:
+        payload = generate_payload(days, timeslots)
+        records = decode_schedule_payload(json_dumps(payload))
+        assert parse_schedule(records) == parse_schedule_pandas(payload)
+
+        pandas_time = min(timeit.repeat(lambda: parse_schedule_pandas(payload), number=1, repeat=3))
+        columnar_time = min(timeit.repeat(lambda: parse_schedule(records), number=1, repeat=3))
+        print(
+            f"{days:>6} {timeslots:>10} {pandas_time:>10.4f} {columnar_time:>12.4f} "
+            f"{pandas_time / columnar_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Times the schedule pipeline as the upstream schedule grows and writes
+the results as JSON, so runs on different revisions can be diffed.
+
+Measured per (days, timeslots) size:
+    decode          ScheduleClient payload decoding (decode_schedule_payload)
+    parse           ScheduleClient payload parsing (parse_schedule)
+    merge           ScheduleService._merge_intervals over every day
+    gaps            ScheduleService._get_gaps_in_intervals over every day
+    find_cold       find_free_slot including the snapshot build
+    find_warm       find_free_slot over an already built snapshot
+
+run:
+    python -m benchmarks.bench_scale
+    python -m benchmarks.bench_scale --size 10000:1000000 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.http_clients import ObjectNotFoundError, decode_schedule_payload, parse_schedule
+from app.logic import ScheduleService
+from app.models import TimeInterval
+from app.utils import json_dumps, str_to_time
+
+from .synthetic import generate_payload
+
+MIN_DAYS, MAX_DAYS = 1, 10_000
+MIN_TIMESLOTS, MAX_TIMESLOTS = 10, 1_000_000
+
+DEFAULT_SIZES = [(1, 10), (30, 1_000), (365, 10_000), (1_000, 100_000), (10_000, 1_000_000)]
+DEFAULT_OUTPUT = "bench_scale.json"
+
+SEARCHED_INTERVAL = TimeInterval(str_to_time("20:00"), str_to_time("21:00"))
+
+
+class _StaticScheduleClient:
+    """hands out an already parsed schedule the way ScheduleClient does"""
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+
+    async def get_schedule(self):
+        return self.schedule
+
+
+def _size(value: str) -> tuple[int, int]:
+    days, _, timeslots = value.partition(":")
+    days, timeslots = int(days), int(timeslots)
+    if not MIN_DAYS <= days <= MAX_DAYS:
+        raise argparse.ArgumentTypeError(f"days must be in {MIN_DAYS}..{MAX_DAYS}")
+    if not MIN_TIMESLOTS <= timeslots <= MAX_TIMESLOTS:
+        raise argparse.ArgumentTypeError(f"timeslots must be in {MIN_TIMESLOTS}..{MAX_TIMESLOTS}")
+    return days, timeslots
+
+
+def _best(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _find_free_slot(loop: asyncio.AbstractEventLoop, service: ScheduleService):
+    try:
+        loop.run_until_complete(service.find_free_slot(SEARCHED_INTERVAL))
+    except ObjectNotFoundError:
+        pass
+
+
+def measure(loop: asyncio.AbstractEventLoop, days: int, timeslots: int, repeat: int, seed: int) -> dict:
+    body = json_dumps(generate_payload(days, timeslots, seed=seed))
+    records = decode_schedule_payload(body)
+    schedule = parse_schedule(records)
+
+    service = ScheduleService(_StaticScheduleClient(schedule))
+    busy_by_day = [
+        (day_schedule.working_hours, sorted(day_schedule.timeslots, key=lambda x: x.start))
+        for day_schedule in schedule.values()
+    ]
+    merged_by_day = [
+        (working_hours, service._merge_intervals(busy))
+        for working_hours, busy in busy_by_day
+    ]
+
+    def merge():
+        for _, busy in busy_by_day:
+            service._merge_intervals(busy)
+
+    def gaps():
+        for working_hours, merged in merged_by_day:
+            service._get_gaps_in_intervals(merged, working_hours)
+
+    def find_cold():
+        _find_free_slot(loop, ScheduleService(_StaticScheduleClient(schedule)))
+
+    _find_free_slot(loop, service)
+
+    return {
+        "days": days,
+        "timeslots": timeslots,
+        "payload_bytes": len(body),
+        "seconds": {
+            "decode": _best(lambda: decode_schedule_payload(body), repeat),
+            "parse": _best(lambda: parse_schedule(records), repeat),
+            "merge": _best(merge, repeat),
+            "gaps": _best(gaps, repeat),
+            "find_cold": _best(find_cold, repeat),
+            "find_warm": _best(lambda: _find_free_slot(loop, service), repeat),
+        },
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--size",
+        type=_size,
+        action="append",
+        dest="sizes",
+        metavar="DAYS:TIMESLOTS",
+        help=f"schedule size, may be repeated (default: {' '.join(f'{d}:{t}' for d, t in DEFAULT_SIZES)})",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write JSON results")
+    args = parser.parse_args(argv)
+
+    results = []
+    loop = asyncio.new_event_loop()
+    print(f"{'days':>6} {'timeslots':>10} " + " ".join(f"{name:>10}" for name in (
+        "decode", "parse", "merge", "gaps", "find_cold", "find_warm"
+    )))
+    for days, timeslots in args.sizes or DEFAULT_SIZES:
+        result = measure(loop, days, timeslots, args.repeat, args.seed)
+        results.append(result)
+        print(f"{days:>6} {timeslots:>10} " + " ".join(f"{value:>10.4f}" for value in result["seconds"].values()))
+    loop.close()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
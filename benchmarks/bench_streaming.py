@@ -0,0 +1,59 @@
+"""
+Compares peak memory and time of whole-body decoding against
+StreamingScheduleParser fed with 64KiB chunks.
+
+run:
+    python -m benchmarks.bench_streaming
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+
+from app.http_clients import StreamingScheduleParser, decode_schedule_payload, parse_schedule
+from app.http_clients.requests import STREAM_CHUNK_SIZE
+
+from .synthetic import generate_payload
+
+SIZES = [(1_000, 100_000), (5_000, 500_000)]
+
+
+def _whole(body: bytes):
+    # the body is held by the caller the same way aiohttp's response.read() holds it
+    return parse_schedule(decode_schedule_payload(bytes(body)))
+
+
+def _streaming(body: bytes):
+    parser = StreamingScheduleParser()
+    view = memoryview(body)
+    for position in range(0, len(body), STREAM_CHUNK_SIZE):
+        parser.feed(bytes(view[position:position + STREAM_CHUNK_SIZE]))
+    return parser.result()
+
+
+def _measure(func, body: bytes) -> tuple[float, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    func(body)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def main():
+    print(f"{'body MB':>8} {'whole s':>8} {'whole peak MB':>14} {'stream s':>9} {'stream peak MB':>15}")
+    for days, timeslots in SIZES:
+        body = json.dumps(generate_payload(days, timeslots)).encode()
+        whole_time, whole_peak = _measure(_whole, body)
+        stream_time, stream_peak = _measure(_streaming, body)
+        print(
+            f"{len(body) / 2 ** 20:>8.1f} {whole_time:>8.2f} {whole_peak:>14.1f} "
+            f"{stream_time:>9.2f} {stream_peak:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
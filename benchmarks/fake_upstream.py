@@ -0,0 +1,110 @@
+"""
+Local stand-in for the upstream /test-task/ endpoint, serves a synthetic
+schedule with configurable size, latency and failure rates.
+
+run:
+    python -m benchmarks.fake_upstream --days 365 --timeslots 10000 --latency 0.05 --error-rate 0.01
+    CONFIG_PATH=benchmarks/fake_upstream.yaml poetry run test_case
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import random
+from dataclasses import dataclass
+
+from aiohttp import web
+
+from app.utils import json_dumps
+
+from .synthetic import generate_payload
+
+
+@dataclass
+class FakeUpstreamOptions:
+    """
+    latency is the mean response delay in seconds, jitter is its +- spread;
+    error_rate of requests get 500, timeout_rate of requests hang for timeout_delay
+    """
+
+    days: int = 365
+    timeslots: int = 10_000
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_delay: float = 600.0
+    etag: bool = False
+    seed: int = 0
+
+
+def create_app(options: FakeUpstreamOptions) -> web.Application:
+    body = json_dumps(generate_payload(options.days, options.timeslots, seed=options.seed))
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    rnd = random.Random(options.seed)
+    stats = {"requests": 0, "errors": 0, "timeouts": 0, "not_modified": 0}
+
+    async def test_task(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        delay = options.latency + rnd.uniform(-options.jitter, options.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = rnd.random()
+        if roll < options.timeout_rate:
+            stats["timeouts"] += 1
+            await asyncio.sleep(options.timeout_delay)
+        elif roll < options.timeout_rate + options.error_rate:
+            stats["errors"] += 1
+            return web.json_response({"detail": "fake upstream failure"}, status=500)
+
+        if options.etag:
+            if request.headers.get("If-None-Match") == etag:
+                stats["not_modified"] += 1
+                return web.Response(status=304, headers={"ETag": etag})
+            return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+        return web.Response(body=body, content_type="application/json")
+
+    async def fake_stats(_: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get("/test-task/", test_task)
+    app.router.add_get("/stats", fake_stats)
+    return app
+
+
+def main(argv: list[str] | None = None):
+    defaults = FakeUpstreamOptions()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--timeslots", type=int, default=defaults.timeslots)
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="mean delay, seconds")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="delay spread, seconds")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="share of 500 responses")
+    parser.add_argument("--timeout-rate", type=float, default=defaults.timeout_rate, help="share of hanging requests")
+    parser.add_argument("--timeout-delay", type=float, default=defaults.timeout_delay, help="how long they hang")
+    parser.add_argument("--etag", action="store_true", help="answer conditional requests with 304")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    options = FakeUpstreamOptions(
+        days=args.days,
+        timeslots=args.timeslots,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_delay=args.timeout_delay,
+        etag=args.etag,
+        seed=args.seed,
+    )
+    web.run_app(create_app(options), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
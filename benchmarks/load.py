@@ -0,0 +1,184 @@
+"""
+Async load generator for the /schedule/* endpoints, reports throughput
+and p50/p95/p99 latency per endpoint.
+
+Dates are picked from the synthetic schedule served by benchmarks.fake_upstream,
+which starts at 2024-01-01.
+
+run:
+    python -m benchmarks.load --url http://127.0.0.1:8000 --concurrency 64 --duration 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import aiohttp
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    failures: int = 0
+
+    def report(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies) + self.failures,
+            "rps": len(latencies) / elapsed,
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+            "failures": self.failures,
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "p99_ms": _percentile(latencies, 99),
+        }
+
+
+def _percentile(latencies: list[float], percent: int) -> float | None:
+    if not latencies:
+        return None
+    if len(latencies) == 1:
+        return latencies[0] * 1000
+    return statistics.quantiles(latencies, n=100, method="inclusive")[percent - 1] * 1000
+
+
+def _time_range(rnd: random.Random) -> tuple[str, str]:
+    start = rnd.randrange(9 * 60, 20 * 60, 15)
+    end = start + rnd.choice((15, 30, 60))
+    return f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}"
+
+
+def build_requests(first_day: date, days: int, rnd: random.Random) -> dict:
+    """endpoint name -> factory of (method, path, params, json) for a random query"""
+
+    def day() -> str:
+        return (first_day + timedelta(days=rnd.randrange(days))).isoformat()
+
+    def day_range() -> dict:
+        date_from = first_day + timedelta(days=rnd.randrange(days))
+        return {"date_from": date_from.isoformat(), "date_to": (date_from + timedelta(days=7)).isoformat()}
+
+    def slot() -> dict:
+        start, end = _time_range(rnd)
+        return {"day": day(), "start": start, "end": end}
+
+    def interval() -> dict:
+        start, end = _time_range(rnd)
+        return {"start": start, "end": end}
+
+    return {
+        "busy_slots": lambda: ("GET", "/schedule/busy_slots", {"day": day()}, None),
+        "free_slots": lambda: ("GET", "/schedule/free_slots", {"day": day()}, None),
+        "busy_slots/range": lambda: ("GET", "/schedule/busy_slots/range", day_range(), None),
+        "free_slots/range": lambda: ("GET", "/schedule/free_slots/range", day_range(), None),
+        "is_slot_free": lambda: ("GET", "/schedule/is_slot_free", slot(), None),
+        "is_slots_free": lambda: ("POST", "/schedule/is_slots_free", None, [slot() for _ in range(10)]),
+        "find_free_slot": lambda: ("GET", "/schedule/find_free_slot", interval(), None),
+        "find_free_slots": lambda: ("GET", "/schedule/find_free_slots", {**interval(), "limit": 10}, None),
+    }
+
+
+async def _worker(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    requests: dict,
+    stats: dict[str, EndpointStats],
+    deadline: float,
+    rnd: random.Random,
+):
+    names = list(requests)
+    while time.perf_counter() < deadline:
+        name = rnd.choice(names)
+        method, path, params, payload = requests[name]()
+        started = time.perf_counter()
+        try:
+            async with session.request(method, base_url + path, params=params, json=payload) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            stats[name].failures += 1
+            continue
+        stats[name].latencies.append(time.perf_counter() - started)
+        stats[name].statuses[response.status] += 1
+
+
+async def run(
+    base_url: str,
+    concurrency: int,
+    duration: float,
+    first_day: date,
+    days: int,
+    seed: int = 0,
+) -> dict:
+    stats: dict[str, EndpointStats] = defaultdict(EndpointStats)
+    rnd = random.Random(seed)
+    requests = build_requests(first_day, days, rnd)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _worker(session, base_url.rstrip("/"), requests, stats, deadline, random.Random(rnd.random()))
+            for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    total = EndpointStats()
+    for endpoint_stats in stats.values():
+        total.latencies.extend(endpoint_stats.latencies)
+        total.statuses.update(endpoint_stats.statuses)
+        total.failures += endpoint_stats.failures
+
+    return {
+        "url": base_url,
+        "concurrency": concurrency,
+        "duration": elapsed,
+        "total": total.report(elapsed),
+        "endpoints": {name: stats[name].report(elapsed) for name in sorted(stats)},
+    }
+
+
+def _print_report(report: dict):
+    print(f"{'endpoint':>18} {'requests':>9} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    rows = list(report["endpoints"].items()) + [("total", report["total"])]
+    for name, row in rows:
+        percentiles = " ".join(
+            f"{row[key]:>8.1f}" if row[key] is not None else f"{'-':>8}"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        )
+        statuses = ", ".join(f"{code}: {count}" for code, count in row["statuses"].items())
+        if row["failures"]:
+            statuses += f", failed: {row['failures']}"
+        print(f"{name:>18} {row['requests']:>9} {row['rps']:>8.1f} {percentiles}  {statuses}")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="test_case base url")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--first-day", type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument("--days", type=int, default=365, help="days queries are spread over")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args.url, args.concurrency, args.duration, args.first_day, args.days, args.seed))
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Synthetic /test-task/ payload generator is defined here
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+
+
+def _minutes_to_str(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def generate_payload(days: int, timeslots: int, seed: int = 0) -> dict:
+    """
+    builds upstream-shaped payload with `days` working days (09:00-21:00)
+    and `timeslots` busy slots spread randomly over them
+    """
+    rnd = random.Random(seed)
+    first_day = date(2024, 1, 1)
+
+    payload_days = [
+        {
+            "id": day_id,
+            "date": (first_day + timedelta(days=day_id)).isoformat(),
+            "start": "09:00",
+            "end": "21:00",
+        }
+        for day_id in range(days)
+    ]
+
+    payload_timeslots = []
+    for timeslot_id in range(timeslots):
+        start = rnd.randrange(9 * 60, 20 * 60, 5)
+        end = min(start + rnd.choice((15, 30, 45, 60)), 21 * 60)
+        payload_timeslots.append(
+            {
+                "id": timeslot_id,
+                "day_id": rnd.randrange(days),
+                "start": _minutes_to_str(start),
+                "end": _minutes_to_str(end),
+            }
+        )
+
+    return {"days": payload_days, "timeslots": payload_timeslots}
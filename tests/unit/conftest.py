@@ -0,0 +1,27 @@
+import pytest_asyncio
+from aiohttp import web
+
+
+@pytest_asyncio.fixture
+async def upstream_server():
+    """
+    starts a local upstream answering GET /test-task/ with the given handler and returns its url,
+    every server started by a test is stopped after it
+    """
+    runners = []
+
+    async def start(handler) -> str:
+        app = web.Application()
+        app.router.add_get("/test-task/", handler)
+        # handlers of requests given up by the client are cancelled, so hanging ones do not hold up cleanup
+        runner = web.AppRunner(app, handler_cancellation=True)
+        await runner.setup()
+        runners.append(runner)
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        host, port = runner.addresses[0][:2]
+        return f"http://{host}:{port}/test-task/"
+
+    yield start
+
+    for runner in runners:
+        await runner.cleanup()
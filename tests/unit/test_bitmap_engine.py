@@ -0,0 +1,87 @@
+import random
+
+import pytest
+from datetime import date, time
+from unittest.mock import AsyncMock
+
+from app.logic import ScheduleService
+from app.logic.bitmap import intervals_to_bitmap, is_range_free, iter_runs
+from app.models import DaySchedule, MinuteInterval, TimeInterval, TimeSlot
+
+
+def make_interval(start, end):
+    return MinuteInterval(start, end)
+
+
+def random_day(rnd, day):
+    work_start = rnd.randrange(0, 12 * 60)
+    work_end = rnd.randrange(work_start + 1, 24 * 60)
+    timeslots = []
+    for _ in range(rnd.randrange(0, 15)):
+        start = rnd.randrange(work_start, work_end)
+        end = rnd.randrange(start + 1, work_end + 1)
+        timeslots.append(make_interval(start, end))
+    return DaySchedule(day=day, working_hours=make_interval(work_start, work_end), timeslots=tuple(timeslots))
+
+
+class TestBitmap:
+    def test_iter_runs(self):
+        bitmap = intervals_to_bitmap([
+            make_interval(60, 120),
+            make_interval(120, 180),
+            make_interval(300, 301),
+        ])
+        assert list(iter_runs(bitmap)) == [(60, 180), (300, 301)]
+
+    def test_iter_runs_empty(self):
+        assert list(iter_runs(0)) == []
+
+    def test_is_range_free(self):
+        blocked = intervals_to_bitmap([make_interval(60, 120)])
+        assert is_range_free(blocked, 0, 60) is True
+        assert is_range_free(blocked, 30, 90) is False
+        assert is_range_free(blocked, 120, 240) is True
+        assert is_range_free(blocked, 60, 60) is True
+        assert is_range_free(blocked, 90, 90) is False
+
+
+class TestEngineEquivalence:
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            ScheduleService(AsyncMock(), engine="abacus")
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_same_as_intervals_engine(self, seed):
+        rnd = random.Random(seed)
+        day_schedule = random_day(rnd, date(2024, 10, 10))
+
+        reference = ScheduleService(AsyncMock())._build_day_index(day_schedule)
+        bitmap = ScheduleService(AsyncMock(), engine="bitmap")._build_bitmap_day_index(day_schedule)
+
+        assert bitmap.busy_intervals == reference.busy_intervals
+        assert bitmap.merged_busy_intervals == reference.merged_busy_intervals
+        assert bitmap.free_intervals == reference.free_intervals
+
+        for _ in range(200):
+            start = rnd.randrange(0, 24 * 60)
+            end = rnd.randrange(start, 24 * 60)
+            interval = make_interval(start, end)
+            assert bitmap.is_free(interval) == reference.is_free(interval), interval
+
+
+@pytest.mark.asyncio
+async def test_is_slot_free_with_bitmap_engine():
+    test_date = date(2024, 10, 10)
+    client = AsyncMock()
+    client.get_schedule.return_value = {
+        test_date: DaySchedule(
+            day=test_date,
+            working_hours=MinuteInterval(9 * 60, 18 * 60),
+            timeslots=(MinuteInterval(11 * 60, 12 * 60),),
+        )
+    }
+    service = ScheduleService(client, engine="bitmap")
+
+    assert await service.is_slot_free(TimeSlot(test_date, TimeInterval(time(10, 0), time(11, 0)))) is True
+    assert await service.is_slot_free(TimeSlot(test_date, TimeInterval(time(11, 30), time(12, 30)))) is False
+    assert await service.is_slot_free(TimeSlot(test_date, TimeInterval(time(8, 0), time(9, 30)))) is False
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+from datetime import date, time
+from unittest.mock import AsyncMock
+
+from app.http_clients import DeadlineExceededError, remaining, reset_deadline, set_deadline
+from app.logic import RequestCoalescer, ScheduleService
+from app.models import DaySchedule, MinuteInterval, TimeInterval, TimeSlot
+
+
+TEST_DATE = date(2024, 10, 10)
+
+
+def make_client():
+    schedule = {
+        TEST_DATE: DaySchedule(day=TEST_DATE, working_hours=MinuteInterval(540, 1080), timeslots=(MinuteInterval(600, 660),))
+    }
+
+    async def get_schedule():
+        await asyncio.sleep(0.01)
+        return schedule
+
+    client = AsyncMock()
+    client.get_schedule.side_effect = get_schedule
+    return client
+
+
+@pytest.mark.asyncio
+class TestRequestCoalescer:
+    async def test_identical_calls_share_result(self):
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return [value]
+
+        results = await asyncio.gather(*(coalescer.run(("work", 1), work, 1) for _ in range(5)))
+
+        assert calls == [1]
+        assert all(result is results[0] for result in results)
+        assert coalescer.coalesced == 4
+
+    async def test_different_keys_are_not_shared(self):
+        coalescer = RequestCoalescer()
+        calls = []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0)
+            return value
+
+        assert await asyncio.gather(coalescer.run(1, work, 1), coalescer.run(2, work, 2)) == [1, 2]
+        assert calls == [1, 2]
+
+    async def test_exception_reaches_every_caller(self):
+        coalescer = RequestCoalescer()
+
+        async def work():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(coalescer.run("key", work) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    async def test_cancelled_caller_does_not_cancel_call(self):
+        coalescer = RequestCoalescer()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        first = asyncio.ensure_future(coalescer.run("key", work))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(coalescer.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == 1
+        assert first.cancelled()
+
+    async def test_callers_keep_their_own_deadline(self):
+        coalescer = RequestCoalescer()
+        seen = []
+
+        async def work():
+            seen.append(remaining())
+            await asyncio.sleep(0.1)
+            return "done"
+
+        async def call(timeout):
+            token = set_deadline(timeout)
+            try:
+                return await coalescer.run("key", work)
+            finally:
+                reset_deadline(token)
+
+        results = await asyncio.gather(call(0.01), call(None), return_exceptions=True)
+
+        assert isinstance(results[0], DeadlineExceededError)
+        assert results[1] == "done"
+        assert seen == [None]
+
+
+@pytest.mark.asyncio
+class TestServiceCoalescing:
+    async def test_concurrent_queries_load_schedule_once(self):
+        client = make_client()
+        service = ScheduleService(client, coalesce_requests=True)
+        slot = TimeSlot(TEST_DATE, TimeInterval(time(9, 0), time(10, 0)))
+
+        free, busy, is_free = await asyncio.gather(
+            service.get_free_intervals(TEST_DATE),
+            service.get_busy_intervals(TEST_DATE),
+            service.is_slot_free(slot),
+        )
+
+        assert client.get_schedule.await_count == 1
+        assert free == [MinuteInterval(540, 600), MinuteInterval(660, 1080)]
+        assert busy == [MinuteInterval(600, 660)]
+        assert is_free is True
+        assert service.coalescer.coalesced == 2
+
+    async def test_disabled_by_default(self):
+        client = make_client()
+        service = ScheduleService(client)
+
+        await asyncio.gather(*(service.get_free_intervals(TEST_DATE) for _ in range(3)))
+
+        assert service.coalescer is None
+        assert client.get_schedule.await_count == 3
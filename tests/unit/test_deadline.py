@@ -0,0 +1,172 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from yarl import URL
+from datetime import date
+from unittest.mock import AsyncMock
+
+from app.http_clients import (
+    CircuitBreaker,
+    DeadlineExceededError,
+    ScheduleClient,
+    check_deadline,
+    remaining,
+    reset_deadline,
+    set_deadline,
+    write_schedule_file,
+)
+from app.logic import ScheduleService
+from app.models import DaySchedule, MinuteInterval
+from app.middlewares import DeadlineMiddleware
+from app.utils import ApiConfig
+
+
+class TestDeadline:
+    def test_without_deadline(self):
+        assert remaining() is None
+        check_deadline()
+
+    def test_nested_deadline_is_never_extended(self):
+        outer = set_deadline(0.5)
+        inner = set_deadline(10)
+        try:
+            assert remaining() <= 0.5
+        finally:
+            reset_deadline(inner)
+            reset_deadline(outer)
+        assert remaining() is None
+
+    def test_spent_deadline(self):
+        token = set_deadline(0)
+        try:
+            with pytest.raises(DeadlineExceededError):
+                check_deadline()
+        finally:
+            reset_deadline(token)
+
+
+@pytest.mark.asyncio
+class TestDeadlineMiddleware:
+    async def capture(self, middleware_timeout, headers):
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(remaining())
+
+        await DeadlineMiddleware(app, timeout=middleware_timeout, header="X-Request-Timeout")(
+            {"type": "http", "headers": headers}, None, None
+        )
+        return seen[0]
+
+    async def test_config_timeout(self):
+        assert 4.9 < await self.capture(5, []) <= 5
+
+    async def test_header_shortens_budget(self):
+        assert 0.4 < await self.capture(5, [(b"x-request-timeout", b"0.5")]) <= 0.5
+
+    async def test_header_cannot_extend_budget(self):
+        assert await self.capture(5, [(b"x-request-timeout", b"60")]) <= 5
+
+    async def test_header_without_config(self):
+        assert 0.9 < await self.capture(0, [(b"x-request-timeout", b"1")]) <= 1
+
+    @pytest.mark.parametrize("value", [b"soon", b"-1", b"nan"])
+    async def test_invalid_header_is_ignored(self, value):
+        assert await self.capture(0, [(b"x-request-timeout", value)]) is None
+
+    async def test_deadline_is_reset_after_request(self):
+        await self.capture(5, [])
+        assert remaining() is None
+
+
+@pytest.mark.asyncio
+async def test_service_abandons_spent_request():
+    client = AsyncMock()
+    service = ScheduleService(client)
+
+    token = set_deadline(0)
+    try:
+        with pytest.raises(DeadlineExceededError):
+            await service.get_free_intervals(date(2024, 10, 10))
+    finally:
+        reset_deadline(token)
+
+    client.get_schedule.assert_not_awaited()
+
+
+@pytest_asyncio.fixture
+async def slow_upstream(upstream_server):
+    """answers after 100 ms"""
+    calls = []
+
+    async def test_task(request):
+        calls.append(request)
+        await asyncio.sleep(0.1)
+        return web.json_response({
+            "days": [{"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"}],
+            "timeslots": [],
+        })
+
+    return URL(await upstream_server(test_task)).port, calls
+
+
+@pytest.mark.asyncio
+async def test_shared_load_is_not_bound_to_one_deadline(slow_upstream):
+    port, calls = slow_upstream
+    client = ScheduleClient(ApiConfig(host="http://127.0.0.1", port=port))
+
+    async def get_schedule(timeout):
+        token = set_deadline(timeout)
+        try:
+            return await client.get_schedule()
+        finally:
+            reset_deadline(token)
+
+    impatient, patient = await asyncio.gather(get_schedule(0.01), get_schedule(None), return_exceptions=True)
+
+    assert isinstance(impatient, DeadlineExceededError)
+    assert list(patient) == [date(2024, 10, 10)]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_hanging_upstream_serves_persisted_schedule(upstream_server, tmp_path):
+    calls = []
+
+    async def test_task(request):
+        calls.append(request)
+        await asyncio.Event().wait()
+
+    port = URL(await upstream_server(test_task)).port
+    path = tmp_path / "schedule.snapshot"
+    day = date(2024, 10, 10)
+    write_schedule_file(path, {day: DaySchedule(day=day, working_hours=MinuteInterval(540, 1080), timeslots=())})
+    client = ScheduleClient(
+        ApiConfig(host="http://127.0.0.1", port=port, cache_ttl=0.05, breaker_failure_threshold=1, upstream_timeout=0.2),
+        snapshot_path=path,
+    )
+    client.load_snapshot_file()
+    service = ScheduleService(client)
+
+    async def get_free_intervals():
+        token = set_deadline(0.1)
+        try:
+            return await service.get_free_intervals(day)
+        finally:
+            reset_deadline(token)
+
+    free = [MinuteInterval(540, 1080)]
+    assert await get_free_intervals() == free
+    assert not calls
+    await asyncio.sleep(0.05)
+
+    # served when the deadline runs out while the load is still waiting for the upstream
+    assert await get_free_intervals() == free
+    await asyncio.sleep(0.2)
+
+    # the load timed out as an upstream failure, the open breaker keeps the next requests from the upstream
+    assert client.circuit_breaker.state == CircuitBreaker.OPEN
+    assert await get_free_intervals() == free
+    assert len(calls) == 1
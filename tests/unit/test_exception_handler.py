@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from app.http_clients import APIConnectionError, APITimeoutError, ObjectNotFoundError
+from app.middlewares import ExceptionHandlerMiddleware
+
+
+def make_app(exc=None):
+    async def app(scope, receive, send):
+        if exc is not None:
+            raise exc
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+async def call(app):
+    scope = {"type": "http", "method": "GET", "path": "/schedule/free_slots", "query_string": b"day=2024-10-10", "headers": []}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"], b"".join(m.get("body", b"") for m in messages[1:])
+
+
+@pytest.mark.asyncio
+class TestExceptionHandlerMiddleware:
+    async def test_passes_response_through(self):
+        assert await call(ExceptionHandlerMiddleware(make_app(), debug=False)) == (200, b"ok")
+
+    @pytest.mark.parametrize("exc, status", [
+        (APIConnectionError("down"), 502),
+        (APITimeoutError("slow"), 504),
+        (ObjectNotFoundError("no such day"), 404),
+        (ValueError("boom"), 500),
+    ])
+    async def test_maps_exceptions(self, exc, status):
+        response_status, body = await call(ExceptionHandlerMiddleware(make_app(exc), debug=False))
+
+        assert response_status == status
+        assert "detail" in json.loads(body)
+
+    async def test_debug_trace(self):
+        _, body = await call(ExceptionHandlerMiddleware(make_app(ValueError("boom")), debug=True))
+
+        content = json.loads(body)
+        assert content["error"] == "boom"
+        assert content["path"] == "/schedule/free_slots"
+        assert content["trace"]
+
+    async def test_error_after_response_started_is_reraised(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await call(ExceptionHandlerMiddleware(app, debug=False))
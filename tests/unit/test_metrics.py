@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from aiohttp import web
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+
+from app.fastapi_init import get_app
+from app.http_clients import decode_schedule_payload, handle_get_request
+from app.http_clients.requests import UPSTREAM_PAYLOAD_BYTES, UPSTREAM_REQUEST_SECONDS
+from app.utils import MetricsRegistry
+from app.utils.metrics import _Metric
+
+
+class TestRegistry:
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "latency", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, route="/a")
+        histogram.observe(0.5, route="/a")
+        histogram.observe(5.0, route="/a")
+
+        lines = registry.render().splitlines()
+
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'latency_seconds_count{route="/a"} 3' in lines
+        assert 'latency_seconds_sum{route="/a"} 5.55' in lines
+        assert "# TYPE latency_seconds histogram" in lines
+
+    def test_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("errors_total", "errors", ("type",))
+        counter.inc(type="ValueError")
+        counter.inc(2, type="ValueError")
+        registry.gauge("ratio", "ratio").set(0.5)
+
+        lines = registry.render().splitlines()
+
+        assert 'errors_total{type="ValueError"} 3' in lines
+        assert "ratio 0.5" in lines
+
+    def test_metric_without_samples_is_abstract(self):
+        class Untyped(_Metric):
+            type_name = "untyped"
+
+        with pytest.raises(TypeError):
+            Untyped("untyped", "untyped")
+
+    def test_same_name_is_shared(self):
+        registry = MetricsRegistry()
+        assert registry.counter("a_total", "a") is registry.counter("a_total", "a")
+        with pytest.raises(ValueError):
+            registry.gauge("a_total", "a")
+
+
+@pytest.mark.asyncio
+async def test_upstream_request_is_recorded(upstream_server):
+    async def test_task(_):
+        return web.json_response({"days": []})
+
+    url = await upstream_server(test_task)
+    before = UPSTREAM_REQUEST_SECONDS.count(method="GET", status="200")
+    sizes_before = UPSTREAM_PAYLOAD_BYTES.count(method="GET")
+    await handle_get_request(url)
+
+    assert UPSTREAM_REQUEST_SECONDS.count(method="GET", status="200") == before + 1
+    assert UPSTREAM_PAYLOAD_BYTES.count(method="GET") == sizes_before + 1
+
+
+class TestMetricsEndpoint:
+    @pytest.fixture
+    def client(self):
+        payload = {
+            "days": [{"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"}],
+            "timeslots": [],
+        }
+        with patch(
+            "app.http_clients.schedule_client.handle_get_request",
+            AsyncMock(return_value=decode_schedule_payload(json.dumps(payload).encode())),
+        ):
+            with TestClient(get_app()) as test_client:
+                yield test_client
+
+    def test_exposes_routes_exceptions_and_cache(self, client):
+        client.get("/schedule/free_slots", params={"day": "2024-10-10"})
+        client.get("/schedule/free_slots", params={"day": "2024-10-10"})
+        client.get("/schedule/free_slots", params={"day": "2030-01-01"})
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/schedule/free_slots",status="200"}' in body
+        assert 'route="/schedule/free_slots",status="404"' in body
+        assert 'http_exceptions_total{type="ObjectNotFoundError"}' in body
+        assert 'schedule_cache_requests_total{result="hit"}' in body
+        assert "# TYPE schedule_cache_requests_total counter" in body
+        assert "schedule_cache_hit_ratio " in body
@@ -0,0 +1,105 @@
+import json
+from datetime import date
+
+import pytest
+
+from app.http_clients import (
+    DayRecord,
+    SchedulePayload,
+    StreamingScheduleParser,
+    TimeslotRecord,
+    decode_schedule_payload,
+    parse_schedule,
+)
+from app.models import DaySchedule, MinuteInterval
+
+
+class TestDecodeSchedulePayload:
+    def test_records(self):
+        body = json.dumps({
+            "days": [{"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"}],
+            "timeslots": [{"id": 5, "day_id": 1, "start": "11:00", "end": "12:00"}],
+        }).encode()
+
+        payload = decode_schedule_payload(body)
+
+        assert payload.day_records() == [DayRecord(1, "2024-10-10", "09:00", "18:00")]
+        assert payload.timeslot_records() == [TimeslotRecord(1, "11:00", "12:00")]
+
+    def test_empty_body(self):
+        assert decode_schedule_payload(b"") == SchedulePayload(days=[], timeslots=[])
+        assert decode_schedule_payload(b"null") == SchedulePayload(days=[], timeslots=[])
+
+
+class TestParseSchedule:
+    def test_groups_timeslots_by_day(self):
+        payload = {
+            "days": [
+                {"id": 2, "date": "2024-10-11", "start": "08:00", "end": "17:00"},
+                {"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"},
+            ],
+            "timeslots": [
+                {"id": 1, "day_id": 1, "start": "11:00", "end": "12:00"},
+                {"id": 2, "day_id": 2, "start": "09:00", "end": "10:00"},
+                {"id": 3, "day_id": 1, "start": "09:30", "end": "10:30"},
+            ],
+        }
+
+        schedule = parse_schedule(decode_schedule_payload(json.dumps(payload).encode()))
+
+        assert list(schedule) == [date(2024, 10, 10), date(2024, 10, 11)]
+        assert schedule[date(2024, 10, 10)] == DaySchedule(
+            day=date(2024, 10, 10),
+            working_hours=MinuteInterval(540, 1080),
+            timeslots=(
+                MinuteInterval(660, 720),
+                MinuteInterval(570, 630),
+            ),
+        )
+        assert schedule[date(2024, 10, 11)].timeslots == (MinuteInterval(540, 600),)
+
+    def test_day_without_timeslots(self):
+        payload = {
+            "days": [{"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"}],
+        }
+
+        assert parse_schedule(decode_schedule_payload(json.dumps(payload).encode()))[date(2024, 10, 10)].timeslots == ()
+
+    def test_timeslots_of_unknown_day_are_ignored(self):
+        payload = {
+            "days": [{"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"}],
+            "timeslots": [{"id": 1, "day_id": 7, "start": "11:00", "end": "12:00"}],
+        }
+
+        assert parse_schedule(decode_schedule_payload(json.dumps(payload).encode()))[date(2024, 10, 10)].timeslots == ()
+
+
+class TestStreamingScheduleParser:
+    BODY = json.dumps({
+        "meta": {"note": "braces {in} \"strings\" [ignored]", "days": [{"id": 9}]},
+        "days": [
+            {"id": 2, "date": "2024-10-11", "start": "08:00", "end": "17:00"},
+            {"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"},
+        ],
+        "timeslots": [
+            {"id": 1, "day_id": 1, "start": "11:00", "end": "12:00"},
+            {"id": 2, "day_id": 2, "start": "09:00", "end": "10:00"},
+            {"id": 3, "day_id": 1, "start": "09:30", "end": "10:30"},
+        ],
+    }, indent=2).encode()
+
+    def feed(self, body, chunk_size):
+        parser = StreamingScheduleParser()
+        for position in range(0, len(body), chunk_size):
+            parser.feed(body[position:position + chunk_size])
+        return parser.result()
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 5, 13, 4096])
+    def test_same_as_whole_body(self, chunk_size):
+        expected = parse_schedule(decode_schedule_payload(self.BODY))
+
+        assert self.feed(self.BODY, chunk_size) == expected
+
+    def test_incomplete_document(self):
+        with pytest.raises(ValueError):
+            self.feed(self.BODY[:-10], 64)
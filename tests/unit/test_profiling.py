@@ -0,0 +1,53 @@
+import pstats
+
+import pytest
+
+from app.middlewares import ProfilingMiddleware
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def call(middleware, headers):
+    scope = {"type": "http", "method": "GET", "path": "/schedule/find_free_slot", "query_string": b"", "headers": headers}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return dict(messages[0]["headers"]), b"".join(m.get("body", b"") for m in messages[1:])
+
+
+@pytest.mark.asyncio
+class TestProfilingMiddleware:
+    async def test_without_header_is_not_profiled(self, tmp_path):
+        middleware = ProfilingMiddleware(app, header="X-Profile", directory=str(tmp_path))
+
+        headers, body = await call(middleware, [])
+
+        assert body == b"ok"
+        assert b"x-profile-report" not in headers
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_header_writes_report(self, tmp_path):
+        middleware = ProfilingMiddleware(app, header="X-Profile", directory=str(tmp_path / "profiles"))
+
+        headers, body = await call(middleware, [(b"x-profile", b"1")])
+
+        assert body == b"ok"
+        report = headers[b"x-profile-report"].decode()
+        assert report.startswith(str(tmp_path / "profiles"))
+        assert pstats.Stats(report).total_calls > 0
+
+    async def test_disabled_value(self, tmp_path):
+        middleware = ProfilingMiddleware(app, header="X-Profile", directory=str(tmp_path))
+
+        headers, _ = await call(middleware, [(b"x-profile", b"0")])
+
+        assert b"x-profile-report" not in headers
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from datetime import date, time
+from unittest.mock import AsyncMock
+
+from app.http_clients import APIConnectionError
+from app.logic import ScheduleRefresher, ScheduleService
+from app.models import DaySchedule, MinuteInterval, TimeInterval
+
+
+TEST_DATE = date(2024, 10, 10)
+
+
+def make_schedule(working_hours):
+    return {TEST_DATE: DaySchedule(day=TEST_DATE, working_hours=MinuteInterval.from_interval(working_hours), timeslots=())}
+
+
+@pytest.fixture
+def mock_client():
+    return AsyncMock()
+
+
+@pytest.fixture
+def schedule_service(mock_client):
+    return ScheduleService(mock_client, background_refresh=True)
+
+
+@pytest.mark.asyncio
+class TestBackgroundRefresh:
+    async def test_queries_do_not_hit_client(self, schedule_service, mock_client):
+        mock_client.refresh_schedule.return_value = make_schedule(TimeInterval(time(9, 0), time(18, 0)))
+        await schedule_service.refresh()
+
+        free = await schedule_service.get_free_intervals(TEST_DATE)
+
+        assert free == [MinuteInterval(9 * 60, 18 * 60)]
+        mock_client.get_schedule.assert_not_awaited()
+
+    async def test_last_good_snapshot_survives_failure(self, schedule_service, mock_client):
+        mock_client.refresh_schedule.side_effect = [
+            make_schedule(TimeInterval(time(9, 0), time(18, 0))),
+            APIConnectionError("upstream is down"),
+        ]
+        refresher = ScheduleRefresher(schedule_service, interval=60)
+
+        assert await refresher.refresh() is True
+        assert await refresher.refresh() is False
+
+        assert refresher.failures == 1
+        assert await schedule_service.get_free_intervals(TEST_DATE) == [MinuteInterval(9 * 60, 18 * 60)]
+        assert schedule_service.snapshot_age >= 0
+
+    async def test_falls_back_to_client_without_snapshot(self, schedule_service, mock_client):
+        mock_client.get_schedule.return_value = make_schedule(TimeInterval(time(9, 0), time(18, 0)))
+
+        assert await schedule_service.get_free_intervals(TEST_DATE) == [MinuteInterval(9 * 60, 18 * 60)]
+        mock_client.get_schedule.assert_awaited_once_with()
+
+    async def test_polling_swaps_snapshot(self, schedule_service, mock_client):
+        mock_client.refresh_schedule.side_effect = [
+            make_schedule(TimeInterval(time(9, 0), time(18, 0))),
+            make_schedule(TimeInterval(time(10, 0), time(18, 0))),
+        ] + [make_schedule(TimeInterval(time(10, 0), time(18, 0)))] * 100
+        refresher = ScheduleRefresher(schedule_service, interval=0.001)
+
+        await refresher.start()
+        await asyncio.sleep(0.05)
+        await refresher.stop()
+
+        assert await schedule_service.get_free_intervals(TEST_DATE) == [MinuteInterval(10 * 60, 18 * 60)]
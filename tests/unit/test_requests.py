@@ -0,0 +1,302 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from yarl import URL
+
+from datetime import date
+
+from app.http_clients import (
+    APIConnectionError,
+    CircuitBreaker,
+    ConditionalRequestCache,
+    DeadlineExceededError,
+    HedgingPolicy,
+    StreamingScheduleParser,
+    create_session,
+    handle_get_request,
+    reset_deadline,
+    set_deadline,
+)
+from app.http_clients.requests import UPSTREAM_HEDGES
+from app.utils import ApiConfig
+
+
+PAYLOAD = {
+    "days": [{"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"}],
+    "timeslots": [{"id": 1, "day_id": 1, "start": "11:00", "end": "12:00"}],
+}
+
+
+@pytest_asyncio.fixture
+async def upstream(upstream_server):
+    calls = []
+
+    async def test_task(request):
+        calls.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response(PAYLOAD, headers={"ETag": '"v1"'})
+
+    return await upstream_server(test_task), calls
+
+
+@pytest.mark.asyncio
+class TestConditionalRequests:
+    async def test_not_modified_returns_same_payload(self, upstream):
+        url, calls = upstream
+        conditional_cache = ConditionalRequestCache()
+
+        first = await handle_get_request(url, conditional_cache=conditional_cache)
+        second = await handle_get_request(url, conditional_cache=conditional_cache)
+
+        assert first == PAYLOAD
+        assert second is first
+        assert "If-None-Match" not in calls[0]
+        assert calls[1]["If-None-Match"] == '"v1"'
+        assert conditional_cache.not_modified == 1
+
+    async def test_without_cache_is_unconditional(self, upstream):
+        url, calls = upstream
+
+        await handle_get_request(url)
+        await handle_get_request(url)
+
+        assert all("If-None-Match" not in headers for headers in calls)
+
+
+@pytest.mark.asyncio
+class TestStreamingRequests:
+    async def test_body_is_parsed_incrementally(self, upstream):
+        url, _ = upstream
+
+        schedule = await handle_get_request(url, stream_parser=StreamingScheduleParser)
+
+        assert list(schedule) == [date(2024, 10, 10)]
+        assert len(schedule[date(2024, 10, 10)].timeslots) == 1
+
+    async def test_not_modified_keeps_parsed_schedule(self, upstream):
+        url, _ = upstream
+        conditional_cache = ConditionalRequestCache()
+
+        first = await handle_get_request(url, conditional_cache=conditional_cache, stream_parser=StreamingScheduleParser)
+        second = await handle_get_request(url, conditional_cache=conditional_cache, stream_parser=StreamingScheduleParser)
+
+        assert second is first
+
+
+@pytest.mark.asyncio
+class TestSharedSession:
+    async def test_connection_is_reused(self, upstream_server):
+        peers = []
+
+        async def test_task(request):
+            peers.append(request.transport.get_extra_info("peername"))
+            return web.json_response(PAYLOAD)
+
+        url = await upstream_server(test_task)
+
+        session = create_session(ApiConfig(host="127.0.0.1", port=URL(url).port))
+        try:
+            for _ in range(3):
+                assert await handle_get_request(url, session=session) == PAYLOAD
+            assert not session.closed
+        finally:
+            await session.close()
+
+        # one keep-alive connection served every request
+        assert len(peers) == 3
+        assert len(set(peers)) == 1
+
+
+@pytest_asyncio.fixture
+async def flaky_upstream(upstream_server):
+    """
+    first `slow` requests hang for half a second, requests while `failing` get 500,
+    requests while `hanging` are never answered
+    """
+    state = {"calls": 0, "slow": 0, "failing": False, "hanging": False}
+
+    async def test_task(request):
+        state["calls"] += 1
+        if state["failing"]:
+            return web.Response(status=500)
+        if state["hanging"]:
+            await asyncio.Event().wait()
+        if state["slow"]:
+            state["slow"] -= 1
+            await asyncio.sleep(0.5)
+        return web.json_response(PAYLOAD)
+
+    return await upstream_server(test_task), state
+
+
+class TestCircuitBreaker:
+    def test_opens_and_recovers(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+
+        breaker.before_request()
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(APIConnectionError):
+            breaker.before_request()
+
+        now[0] = 11
+        breaker.before_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(APIConnectionError):
+            breaker.before_request()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.before_request()
+
+    def test_failed_trial_opens_again(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+
+        now[0] = 11
+        breaker.before_request()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(APIConnectionError):
+            breaker.before_request()
+
+
+@pytest.mark.asyncio
+class TestResilientRequests:
+    async def test_server_error_raises(self, flaky_upstream):
+        url, state = flaky_upstream
+        state["failing"] = True
+
+        with pytest.raises(APIConnectionError):
+            await handle_get_request(url)
+
+    async def test_open_breaker_does_not_reach_upstream(self, flaky_upstream):
+        url, state = flaky_upstream
+        state["failing"] = True
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+        with pytest.raises(APIConnectionError):
+            await handle_get_request(url, circuit_breaker=breaker)
+        with pytest.raises(APIConnectionError):
+            await handle_get_request(url, circuit_breaker=breaker)
+
+        assert state["calls"] == 1
+
+    async def test_hanging_upstream_opens_breaker(self, flaky_upstream):
+        url, state = flaky_upstream
+        state["hanging"] = True
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+        started = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await handle_get_request(url, circuit_breaker=breaker, timeout=0.05)
+        with pytest.raises(APIConnectionError):
+            await handle_get_request(url, circuit_breaker=breaker, timeout=0.05)
+
+        assert time.perf_counter() - started < 0.3
+        assert breaker.state == CircuitBreaker.OPEN
+        assert state["calls"] == 1
+
+    async def test_slow_request_is_hedged(self, flaky_upstream):
+        url, state = flaky_upstream
+        state["slow"] = 1
+        hedging = HedgingPolicy(quantile=0.95, min_delay=0.01, max_delay=0.05)
+        won = UPSTREAM_HEDGES.get(outcome="won")
+
+        started = time.perf_counter()
+        payload = await handle_get_request(url, hedging=hedging)
+
+        assert payload == PAYLOAD
+        assert time.perf_counter() - started < 0.3
+        assert state["calls"] == 2
+        assert UPSTREAM_HEDGES.get(outcome="won") == won + 1
+
+    async def test_fast_request_is_not_hedged(self, flaky_upstream):
+        url, state = flaky_upstream
+        hedging = HedgingPolicy(quantile=0.95, min_delay=0.5, max_delay=1.0)
+
+        assert await handle_get_request(url, hedging=hedging) == PAYLOAD
+        assert state["calls"] == 1
+
+
+def slow_first_attempts(slow: float, fast: float):
+    """every request's first attempt takes `slow` seconds, its hedge `fast`"""
+    sent = []
+
+    def send_factory():
+        attempts = []
+
+        async def send():
+            attempts.append(None)
+            sent.append(None)
+            await asyncio.sleep(slow if len(attempts) == 1 else fast)
+            return len(attempts)
+
+        return send
+
+    return send_factory, sent
+
+
+@pytest.mark.asyncio
+class TestHedgingPolicy:
+    async def test_delay_does_not_collapse_under_slow_upstream(self):
+        send_factory, _ = slow_first_attempts(slow=0.1, fast=0.001)
+        hedging = HedgingPolicy(quantile=0.9, min_delay=0.001, max_delay=0.02, min_samples=4, budget=1.0)
+
+        for _ in range(12):
+            assert await hedging.run(send_factory()) == 2
+
+        # only fast hedges finish, cancelled first attempts keep the delay up
+        assert hedging.delay() >= 0.02
+
+    async def test_hedges_are_limited_by_budget(self):
+        send_factory, sent = slow_first_attempts(slow=0.02, fast=0.001)
+        hedging = HedgingPolicy(quantile=0.9, min_delay=0.001, max_delay=0.005, budget=0.25, burst=1)
+        over_budget = UPSTREAM_HEDGES.get(outcome="over_budget")
+
+        for _ in range(12):
+            await hedging.run(send_factory())
+
+        # one saved up token and a quarter of a token per request
+        assert len(sent) - 12 <= 1 + 12 * 0.25
+        assert UPSTREAM_HEDGES.get(outcome="over_budget") > over_budget
+
+
+@pytest.mark.asyncio
+class TestDeadline:
+    async def test_upstream_call_gets_remaining_budget(self, flaky_upstream):
+        url, state = flaky_upstream
+        state["slow"] = 1
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+        token = set_deadline(0.05)
+        started = time.perf_counter()
+        try:
+            with pytest.raises(DeadlineExceededError):
+                await handle_get_request(url, circuit_breaker=breaker)
+        finally:
+            reset_deadline(token)
+
+        assert time.perf_counter() - started < 0.3
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    async def test_spent_budget_skips_upstream(self, flaky_upstream):
+        url, state = flaky_upstream
+
+        token = set_deadline(0)
+        try:
+            with pytest.raises(DeadlineExceededError):
+                await handle_get_request(url)
+        finally:
+            reset_deadline(token)
+
+        assert state["calls"] == 0
@@ -0,0 +1,175 @@
+import json
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.fastapi_init import get_app
+from app.http_clients import create_session, decode_schedule_payload
+from app.logic import ScheduleService
+from app.models import DaySchedule
+
+
+PAYLOAD = {
+    "days": [
+        {"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"},
+        {"id": 2, "date": "2024-10-11", "start": "09:00", "end": "18:00"},
+    ],
+    "timeslots": [{"id": 1, "day_id": 1, "start": "10:00", "end": "11:00"}],
+}
+
+
+@pytest.fixture
+def upstream():
+    with patch("app.http_clients.schedule_client.handle_get_request", AsyncMock(return_value=decode_schedule_payload(json.dumps(PAYLOAD).encode()))) as request:
+        yield request
+
+
+@pytest.fixture
+def client(upstream):
+    with TestClient(get_app()) as test_client:
+        yield test_client
+
+
+class TestCacheHeaders:
+    def test_etag_and_cache_control(self, client):
+        response = client.get("/schedule/free_slots", params={"day": "2024-10-10"})
+
+        assert response.status_code == 200
+        assert response.headers["etag"]
+        assert response.headers["cache-control"].startswith("public, max-age=")
+
+    def test_not_modified(self, client):
+        etag = client.get("/schedule/free_slots", params={"day": "2024-10-10"}).headers["etag"]
+
+        with patch.object(ScheduleService, "get_free_intervals") as get_free_intervals:
+            response = client.get(
+                "/schedule/free_slots", params={"day": "2024-10-10"}, headers={"If-None-Match": etag}
+            )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        get_free_intervals.assert_not_called()
+
+    @pytest.mark.parametrize("path, params", [
+        ("/schedule/busy_slots", {"day": "2024-10-10"}),
+        ("/schedule/busy_slots/range", {"date_from": "2024-10-10", "date_to": "2024-10-11"}),
+        ("/schedule/free_slots/range", {"date_from": "2024-10-10", "date_to": "2024-10-11"}),
+        ("/schedule/is_slot_free", {"day": "2024-10-10", "start": "10:00", "end": "11:00"}),
+        ("/schedule/find_free_slot", {"start": "12:00", "end": "13:00"}),
+        ("/schedule/find_free_slots", {"start": "12:00", "end": "13:00", "limit": 2}),
+    ])
+    def test_every_query_answers_not_modified(self, client, path, params):
+        first = client.get(path, params=params)
+        assert first.status_code == 200
+
+        response = client.get(path, params=params, headers={"If-None-Match": first.headers["etag"]})
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == first.headers["etag"]
+
+    def test_etag_depends_on_query(self, client):
+        first = client.get("/schedule/free_slots", params={"day": "2024-10-10"})
+        second = client.get("/schedule/free_slots", params={"day": "2024-10-11"})
+        busy = client.get("/schedule/busy_slots", params={"day": "2024-10-10"})
+
+        assert len({first.headers["etag"], second.headers["etag"], busy.headers["etag"]}) == 3
+
+    def test_etag_and_body_come_from_one_snapshot(self, client):
+        first = client.get("/schedule/free_slots", params={"day": "2024-10-10"})
+        schedule_service = client.app.state.schedule_service
+        current = schedule_service._snapshot
+        refreshed = schedule_service._build_snapshot({
+            day: DaySchedule(day=day, working_hours=day_schedule.working_hours, timeslots=())
+            for day, day_schedule in current.source.items()
+        })
+
+        # the schedule is refreshed while the request is handled
+        with patch.object(ScheduleService, "get_snapshot", AsyncMock(side_effect=[current, refreshed])):
+            response = client.get("/schedule/free_slots", params={"day": "2024-10-10"})
+
+        assert response.headers["etag"] == first.headers["etag"]
+        assert response.json() == first.json()
+
+
+class TestRangeEndpoints:
+    def test_ndjson_lines(self, client):
+        response = client.get(
+            "/schedule/busy_slots/range", params={"date_from": "2024-10-01", "date_to": "2024-10-31"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line) for line in response.text.splitlines()] == [
+            {"day": "2024-10-10", "intervals": [{"start": "10:00", "end": "11:00"}]},
+            {"day": "2024-10-11", "intervals": []},
+        ]
+
+    def test_not_streamed_through_threadpool(self, client):
+        with patch("starlette.responses.iterate_in_threadpool") as iterate_in_threadpool:
+            response = client.get(
+                "/schedule/free_slots/range", params={"date_from": "2024-10-01", "date_to": "2024-10-31"}
+            )
+
+        assert len(response.text.splitlines()) == 2
+        iterate_in_threadpool.assert_not_called()
+
+    def test_inverted_range(self, client):
+        response = client.get(
+            "/schedule/free_slots/range", params={"date_from": "2024-10-31", "date_to": "2024-10-01"}
+        )
+
+        assert response.status_code == 422
+
+
+class TestBatchEndpoint:
+    def test_answers_in_order(self, client):
+        response = client.post("/schedule/is_slots_free", json=[
+            {"day": "2024-10-10", "start": "10:00", "end": "11:00"},
+            {"day": "2024-10-11", "start": "10:00", "end": "11:00"},
+        ])
+
+        assert response.status_code == 200
+        assert response.json() == [False, True]
+
+    def test_unknown_day_is_not_found(self, client):
+        slot = {"day": "2024-10-12", "start": "10:00", "end": "11:00"}
+
+        single = client.get("/schedule/is_slot_free", params=slot)
+        batch = client.post("/schedule/is_slots_free", json=[slot])
+
+        assert single.status_code == batch.status_code == 404
+
+
+class TestDeadline:
+    def test_spent_budget_is_gateway_timeout(self, client):
+        response = client.get(
+            "/schedule/free_slots",
+            params={"day": "2024-10-10"},
+            headers={"X-Request-Timeout": "0.000001"},
+        )
+
+        assert response.status_code == 504
+
+
+class TestLifespan:
+    def test_one_session_is_shared_and_closed(self, upstream):
+        sessions = []
+
+        def create(api_config):
+            sessions.append(create_session(api_config))
+            return sessions[-1]
+
+        app = get_app()
+        with patch("app.fastapi_init.create_session", create):
+            with TestClient(app) as test_client:
+                test_client.get("/schedule/free_slots", params={"day": "2024-10-10"})
+                test_client.post("/schedule/is_slots_free", json=[{"day": "2024-10-10", "start": "10:00", "end": "11:00"}])
+                assert not sessions[0].closed
+
+        assert len(sessions) == 1
+        assert sessions[0].closed
+        assert upstream.call_args_list
+        assert all(call.kwargs["session"] is sessions[0] for call in upstream.call_args_list)
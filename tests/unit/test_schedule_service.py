@@ -1,7 +1,7 @@
 import pytest
 from datetime import date, time
 from unittest.mock import AsyncMock
-from app.models import TimeInterval, TimeSlot
+from app.models import DaySchedule, MinuteInterval, TimeInterval, TimeSlot
 from app.logic import ScheduleService
 from app.http_clients import ObjectNotFoundError
 
@@ -17,6 +17,22 @@ def schedule_service(mock_client):
     return ScheduleService(mock_client)
 
 
+def make_schedule(*days):
+    """builds client schedule out of (day, working_hours, timeslots) tuples"""
+    return {
+        day: DaySchedule(
+            day=day,
+            working_hours=MinuteInterval.from_interval(working_hours),
+            timeslots=tuple(MinuteInterval.from_interval(timeslot) for timeslot in timeslots),
+        )
+        for day, working_hours, timeslots in days
+    }
+
+
+def to_time_intervals(intervals):
+    return [interval.to_interval() for interval in intervals]
+
+
 class TestMergeIntervals:
     def test_empty_list(self, schedule_service):
         assert schedule_service._merge_intervals([]) == []
@@ -123,29 +139,40 @@ class TestIsIntervalInIntervals:
 class TestGetBusyIntervals:
     async def test_success(self, schedule_service, mock_client):
         test_date = date(2024, 10, 10)
-        mock_client.get_day_timeslots.return_value = [
-            TimeInterval(time(11, 0), time(12, 0)),
-            TimeInterval(time(9, 30), time(10, 30))
-        ]
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [
+                TimeInterval(time(11, 0), time(12, 0)),
+                TimeInterval(time(9, 30), time(10, 30))
+            ])
+        )
         
         busy = await schedule_service.get_busy_intervals(test_date)
-        assert busy == [
+        assert to_time_intervals(busy) == [
             TimeInterval(time(9, 30), time(10, 30)),
             TimeInterval(time(11, 0), time(12, 0))
         ]
-        mock_client.get_day_timeslots.assert_awaited_once_with(test_date)
+        mock_client.get_schedule.assert_awaited_once_with()
 
     async def test_no_timeslots(self, schedule_service, mock_client):
         test_date = date(2024, 10, 10)
-        mock_client.get_day_timeslots.return_value = []
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [])
+        )
         
         busy = await schedule_service.get_busy_intervals(test_date)
         assert busy == []
-        mock_client.get_day_timeslots.assert_awaited_once_with(test_date)
+        mock_client.get_schedule.assert_awaited_once_with()
 
     async def test_day_not_found(self, schedule_service, mock_client):
         test_date = date(2024, 10, 10)
-        mock_client.get_day_timeslots.side_effect = ObjectNotFoundError("Day not found")
+        mock_client.get_schedule.return_value = make_schedule()
+        
+        with pytest.raises(ObjectNotFoundError):
+            await schedule_service.get_busy_intervals(test_date)
+
+    async def test_upstream_error(self, schedule_service, mock_client):
+        test_date = date(2024, 10, 10)
+        mock_client.get_schedule.side_effect = ObjectNotFoundError("No data available")
         
         with pytest.raises(ObjectNotFoundError):
             await schedule_service.get_busy_intervals(test_date)
@@ -155,35 +182,62 @@ class TestGetBusyIntervals:
 class TestGetFreeIntervals:
     async def test_success(self, schedule_service, mock_client):
         test_date = date(2024, 10, 10)
-        mock_client.get_day_interval.return_value = TimeInterval(time(9, 0), time(18, 0))
-        mock_client.get_day_timeslots.return_value = [
-            TimeInterval(time(11, 0), time(12, 0))
-        ]
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [
+                TimeInterval(time(11, 0), time(12, 0))
+            ])
+        )
         
         free = await schedule_service.get_free_intervals(test_date)
-        assert free == [
+        assert to_time_intervals(free) == [
             TimeInterval(time(9, 0), time(11, 0)),
             TimeInterval(time(12, 0), time(18, 0))
         ]
 
     async def test_full_day_free(self, schedule_service, mock_client):
         test_date = date(2024, 10, 10)
-        mock_client.get_day_interval.return_value = TimeInterval(time(9, 0), time(18, 0))
-        mock_client.get_day_timeslots.return_value = []
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [])
+        )
         
         free = await schedule_service.get_free_intervals(test_date)
-        assert free == [TimeInterval(time(9, 0), time(18, 0))]
+        assert to_time_intervals(free) == [TimeInterval(time(9, 0), time(18, 0))]
 
     async def test_full_day_busy(self, schedule_service, mock_client):
         test_date = date(2024, 10, 10)
         work_day = TimeInterval(time(9, 0), time(18, 0))
-        mock_client.get_day_interval.return_value = work_day
-        mock_client.get_day_timeslots.return_value = [work_day]
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, work_day, [work_day])
+        )
         
         free = await schedule_service.get_free_intervals(test_date)
         assert free == []
 
 
+@pytest.mark.asyncio
+class TestGetSnapshot:
+    async def test_reused_for_same_payload(self, schedule_service, mock_client):
+        test_date = date(2024, 10, 10)
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [])
+        )
+
+        first = await schedule_service.get_snapshot()
+        second = await schedule_service.get_snapshot()
+        assert first is second
+
+    async def test_rebuilt_for_new_payload(self, schedule_service, mock_client):
+        test_date = date(2024, 10, 10)
+        mock_client.get_schedule.side_effect = [
+            make_schedule((test_date, TimeInterval(time(9, 0), time(18, 0)), [])),
+            make_schedule((test_date, TimeInterval(time(10, 0), time(18, 0)), [])),
+        ]
+
+        await schedule_service.get_snapshot()
+        snapshot = await schedule_service.get_snapshot()
+        assert to_time_intervals(snapshot.get_day(test_date).free_intervals) == [TimeInterval(time(10, 0), time(18, 0))]
+
+
 @pytest.mark.asyncio
 class TestIsSlotFree:
     async def test_free_slot(self, schedule_service, mock_client):
@@ -193,10 +247,11 @@ class TestIsSlotFree:
             interval=TimeInterval(time(10, 0), time(11, 0))
         )
         
-        mock_client.get_day_interval.return_value = TimeInterval(time(9, 0), time(18, 0))
-        mock_client.get_day_timeslots.return_value = [
-            TimeInterval(time(11, 0), time(12, 0))
-        ]
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [
+                TimeInterval(time(11, 0), time(12, 0))
+            ])
+        )
         
         assert await schedule_service.is_slot_free(slot) is True
 
@@ -207,10 +262,11 @@ class TestIsSlotFree:
             interval=TimeInterval(time(11, 0), time(12, 0))
         )
         
-        mock_client.get_day_interval.return_value = TimeInterval(time(9, 0), time(18, 0))
-        mock_client.get_day_timeslots.return_value = [
-            TimeInterval(time(11, 0), time(12, 0))
-        ]
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [
+                TimeInterval(time(11, 0), time(12, 0))
+            ])
+        )
         
         assert await schedule_service.is_slot_free(slot) is False
 
@@ -221,10 +277,11 @@ class TestIsSlotFree:
             interval=TimeInterval(time(11, 30), time(12, 30))
         )
         
-        mock_client.get_day_interval.return_value = TimeInterval(time(9, 0), time(18, 0))
-        mock_client.get_day_timeslots.return_value = [
-            TimeInterval(time(11, 0), time(12, 0))
-        ]
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [
+                TimeInterval(time(11, 0), time(12, 0))
+            ])
+        )
         
         assert await schedule_service.is_slot_free(slot) is False
 
@@ -235,11 +292,11 @@ class TestFindFreeSlot:
         test_date = date(2024, 10, 10)
         interval = TimeInterval(time(10, 0), time(11, 0))
         
-        mock_client.get_available_days.return_value = [test_date]
-        mock_client.get_day_interval.return_value = TimeInterval(time(9, 0), time(18, 0))
-        mock_client.get_day_timeslots.return_value = [
-            TimeInterval(time(11, 0), time(12, 0))
-        ]
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [
+                TimeInterval(time(11, 0), time(12, 0))
+            ])
+        )
         
         result = await schedule_service.find_free_slot(interval)
         assert result == TimeSlot(day=test_date, interval=interval)
@@ -248,16 +305,10 @@ class TestFindFreeSlot:
         days = [date(2024, 10, 10), date(2024, 10, 11)]
         interval = TimeInterval(time(10, 0), time(11, 0))
         
-        mock_client.get_available_days.return_value = days
-        
-        mock_client.get_day_interval.side_effect = [
-            TimeInterval(time(9, 0), time(18, 0)),
-            TimeInterval(time(8, 0), time(17, 0))
-        ]
-        mock_client.get_day_timeslots.side_effect = [
-            [TimeInterval(time(9, 0), time(18, 0))],
-            []
-        ]
+        mock_client.get_schedule.return_value = make_schedule(
+            (days[0], TimeInterval(time(9, 0), time(18, 0)), [TimeInterval(time(9, 0), time(18, 0))]),
+            (days[1], TimeInterval(time(8, 0), time(17, 0)), []),
+        )
         
         result = await schedule_service.find_free_slot(interval)
         assert result == TimeSlot(day=days[1], interval=interval)
@@ -266,11 +317,186 @@ class TestFindFreeSlot:
         days = [date(2024, 10, 10), date(2024, 10, 11)]
         interval = TimeInterval(time(10, 0), time(11, 0))
         
-        mock_client.get_available_days.return_value = days
-        mock_client.get_day_interval.return_value = TimeInterval(time(9, 0), time(18, 0))
-        mock_client.get_day_timeslots.return_value = [
-            TimeInterval(time(9, 0), time(18, 0))
-        ]
+        mock_client.get_schedule.return_value = make_schedule(
+            *((day, TimeInterval(time(9, 0), time(18, 0)), [TimeInterval(time(9, 0), time(18, 0))]) for day in days)
+        )
        
         with pytest.raises(ObjectNotFoundError):
             await schedule_service.find_free_slot(interval)
+
+    async def test_single_upstream_load(self, schedule_service, mock_client):
+        days = [date(2024, 10, 10), date(2024, 10, 11), date(2024, 10, 12)]
+        interval = TimeInterval(time(10, 0), time(11, 0))
+
+        mock_client.get_schedule.return_value = make_schedule(
+            *((day, TimeInterval(time(9, 0), time(18, 0)), []) for day in days)
+        )
+
+        await schedule_service.find_free_slot(interval)
+        mock_client.get_schedule.assert_awaited_once_with()
+        mock_client.get_available_days.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+class TestFindFreeSlots:
+    async def test_first_n_matches(self, schedule_service, mock_client):
+        days = [date(2024, 10, 10), date(2024, 10, 11), date(2024, 10, 12), date(2024, 10, 13)]
+        interval = TimeInterval(time(10, 0), time(11, 0))
+
+        mock_client.get_schedule.return_value = make_schedule(
+            (days[0], TimeInterval(time(9, 0), time(18, 0)), [TimeInterval(time(10, 30), time(11, 0))]),
+            (days[1], TimeInterval(time(9, 0), time(18, 0)), []),
+            (days[2], TimeInterval(time(9, 0), time(18, 0)), []),
+            (days[3], TimeInterval(time(9, 0), time(18, 0)), []),
+        )
+
+        result = await schedule_service.find_free_slots(interval, limit=2)
+        assert result == [
+            TimeSlot(day=days[1], interval=interval),
+            TimeSlot(day=days[2], interval=interval),
+        ]
+
+    async def test_no_matches(self, schedule_service, mock_client):
+        test_date = date(2024, 10, 10)
+        interval = TimeInterval(time(10, 0), time(11, 0))
+
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(12, 0), time(18, 0)), [])
+        )
+
+        assert await schedule_service.find_free_slots(interval, limit=5) == []
+
+
+@pytest.mark.asyncio
+class TestAreSlotsFree:
+    async def test_keeps_order_across_days(self, schedule_service, mock_client):
+        days = [date(2024, 10, 10), date(2024, 10, 11)]
+        mock_client.get_schedule.return_value = make_schedule(
+            (days[0], TimeInterval(time(9, 0), time(18, 0)), [TimeInterval(time(11, 0), time(12, 0))]),
+            (days[1], TimeInterval(time(9, 0), time(18, 0)), []),
+        )
+        slots = [
+            TimeSlot(days[0], TimeInterval(time(12, 0), time(13, 0))),
+            TimeSlot(days[1], TimeInterval(time(11, 0), time(12, 0))),
+            TimeSlot(days[0], TimeInterval(time(11, 30), time(12, 30))),
+            TimeSlot(days[0], TimeInterval(time(9, 0), time(11, 0))),
+            TimeSlot(days[0], TimeInterval(time(17, 0), time(19, 0))),
+        ]
+
+        assert await schedule_service.are_slots_free(slots) == [True, True, False, True, False]
+        mock_client.get_schedule.assert_awaited_once_with()
+
+    async def test_unknown_day_fails_like_is_slot_free(self, schedule_service, mock_client):
+        mock_client.get_schedule.return_value = make_schedule(
+            (date(2024, 10, 10), TimeInterval(time(9, 0), time(18, 0)), [])
+        )
+        known = TimeSlot(date(2024, 10, 10), TimeInterval(time(10, 0), time(11, 0)))
+        unknown = TimeSlot(date(2024, 10, 12), TimeInterval(time(10, 0), time(11, 0)))
+
+        with pytest.raises(ObjectNotFoundError):
+            await schedule_service.is_slot_free(unknown)
+        with pytest.raises(ObjectNotFoundError):
+            await schedule_service.are_slots_free([known, unknown])
+
+    async def test_matches_is_slot_free(self, schedule_service, mock_client):
+        test_date = date(2024, 10, 10)
+        mock_client.get_schedule.return_value = make_schedule(
+            (test_date, TimeInterval(time(9, 0), time(18, 0)), [
+                TimeInterval(time(10, 0), time(10, 30)),
+                TimeInterval(time(13, 0), time(14, 0)),
+            ])
+        )
+        slots = [
+            TimeSlot(test_date, TimeInterval(time(hour, minute), time(end_hour, end_minute)))
+            for hour in range(8, 18) for minute in (0, 30)
+            for end_hour, end_minute in ((hour, 45), (hour + 1, minute))
+            if (hour, minute) <= (end_hour, end_minute)
+        ]
+
+        expected = [await schedule_service.is_slot_free(slot) for slot in slots]
+        assert await schedule_service.are_slots_free(slots) == expected
+
+
+@pytest.mark.asyncio
+class TestIntervalsRange:
+    async def test_only_days_in_range(self, schedule_service, mock_client):
+        days = [date(2024, 10, 10), date(2024, 10, 11), date(2024, 10, 13)]
+        mock_client.get_schedule.return_value = make_schedule(
+            (days[0], TimeInterval(time(9, 0), time(18, 0)), [TimeInterval(time(11, 0), time(12, 0))]),
+            (days[1], TimeInterval(time(9, 0), time(18, 0)), []),
+            (days[2], TimeInterval(time(9, 0), time(18, 0)), []),
+        )
+
+        free = [
+            (day, to_time_intervals(intervals))
+            for day, intervals in await schedule_service.get_free_intervals_range(date(2024, 10, 9), date(2024, 10, 12))
+        ]
+        assert free == [
+            (days[0], [TimeInterval(time(9, 0), time(11, 0)), TimeInterval(time(12, 0), time(18, 0))]),
+            (days[1], [TimeInterval(time(9, 0), time(18, 0))]),
+        ]
+
+        busy = [
+            (day, to_time_intervals(intervals))
+            for day, intervals in await schedule_service.get_busy_intervals_range(days[0], days[2])
+        ]
+        assert busy == [
+            (days[0], [TimeInterval(time(11, 0), time(12, 0))]),
+            (days[1], []),
+            (days[2], []),
+        ]
+        assert mock_client.get_schedule.await_count == 2
+
+
+@pytest.mark.asyncio
+class TestIncrementalSnapshot:
+    DAYS = [date(2024, 10, 10), date(2024, 10, 11), date(2024, 10, 12)]
+
+    def make_days(self, second_day_timeslots):
+        return make_schedule(
+            (self.DAYS[0], TimeInterval(time(9, 0), time(18, 0)), [TimeInterval(time(11, 0), time(12, 0))]),
+            (self.DAYS[1], TimeInterval(time(9, 0), time(18, 0)), second_day_timeslots),
+            (self.DAYS[2], TimeInterval(time(9, 0), time(18, 0)), []),
+        )
+
+    async def test_only_changed_days_are_rebuilt(self, schedule_service, mock_client):
+        mock_client.refresh_schedule.side_effect = [
+            self.make_days([]),
+            self.make_days([TimeInterval(time(9, 0), time(10, 0))]),
+        ]
+        first = await schedule_service.refresh()
+        second = await schedule_service.refresh()
+
+        assert (first.days_changed, first.days_reused) == (3, 0)
+        assert (second.days_changed, second.days_reused) == (1, 2)
+        assert second.days[self.DAYS[0]] is first.days[self.DAYS[0]]
+        assert second.days[self.DAYS[2]] is first.days[self.DAYS[2]]
+        assert to_time_intervals(second.get_day(self.DAYS[1]).free_intervals) == [
+            TimeInterval(time(10, 0), time(18, 0))
+        ]
+        assert second.version != first.version
+
+    async def test_equal_content_keeps_version(self, schedule_service, mock_client):
+        mock_client.refresh_schedule.side_effect = [self.make_days([]), self.make_days([])]
+
+        first = await schedule_service.refresh()
+        second = await schedule_service.refresh()
+
+        assert second is not first
+        assert second.days_reused == 3
+        assert second.version == first.version
+
+    async def test_removed_and_added_days(self, schedule_service, mock_client):
+        new_day = date(2024, 10, 13)
+        mock_client.refresh_schedule.side_effect = [
+            self.make_days([]),
+            make_schedule(
+                (self.DAYS[0], TimeInterval(time(9, 0), time(18, 0)), [TimeInterval(time(11, 0), time(12, 0))]),
+                (new_day, TimeInterval(time(9, 0), time(18, 0)), []),
+            ),
+        ]
+        await schedule_service.refresh()
+        second = await schedule_service.refresh()
+
+        assert list(second.days) == [self.DAYS[0], new_day]
+        assert (second.days_changed, second.days_reused) == (1, 1)
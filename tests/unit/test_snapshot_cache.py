@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+from app.http_clients import ScheduleClient, SnapshotCache, decode_schedule_payload
+from app.utils import ApiConfig
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.mark.asyncio
+class TestSnapshotCache:
+    async def test_hit_within_ttl(self, clock):
+        cache = SnapshotCache(ttl=10, clock=clock)
+        loader = AsyncMock(return_value={"days": []})
+
+        assert await cache.get(loader) == {"days": []}
+        clock.now = 9
+        assert await cache.get(loader) == {"days": []}
+
+        loader.assert_awaited_once()
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    async def test_miss_after_ttl(self, clock):
+        cache = SnapshotCache(ttl=10, clock=clock)
+        loader = AsyncMock(side_effect=[1, 2])
+
+        assert await cache.get(loader) == 1
+        clock.now = 10
+        assert await cache.get(loader) == 2
+        assert (cache.hits, cache.misses) == (0, 2)
+
+    async def test_concurrent_callers_share_load(self, clock):
+        cache = SnapshotCache(ttl=10, clock=clock)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "payload"
+
+        results = await asyncio.gather(*(cache.get(loader) for _ in range(20)))
+
+        assert results == ["payload"] * 20
+        assert calls == 1
+        assert (cache.hits, cache.misses) == (19, 1)
+
+    async def test_error_is_not_cached(self, clock):
+        cache = SnapshotCache(ttl=10, clock=clock)
+        loader = AsyncMock(side_effect=[RuntimeError("boom"), "payload"])
+
+        with pytest.raises(RuntimeError):
+            await cache.get(loader)
+        assert await cache.get(loader) == "payload"
+
+
+@pytest.mark.asyncio
+class TestScheduleClientCache:
+    async def test_methods_share_one_fetch(self):
+        payload = decode_schedule_payload(json.dumps({
+            "days": [{"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"}],
+            "timeslots": [{"id": 1, "day_id": 1, "start": "11:00", "end": "12:00"}],
+        }).encode())
+        client = ScheduleClient(ApiConfig(host="http://upstream", port=80))
+
+        with patch(
+            "app.http_clients.schedule_client.handle_get_request",
+            AsyncMock(return_value=payload),
+        ) as request:
+            await client.get_day_timeslots(date(2024, 10, 10))
+            await client.get_day_interval(date(2024, 10, 10))
+            await client.get_available_days()
+
+        request.assert_awaited_once()
+        assert (client.cache.hits, client.cache.misses) == (2, 1)
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+import time
+
+import aiohttp
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+from app.http_clients import (
+    APIConnectionError,
+    ObjectNotFoundError,
+    ScheduleClient,
+    SharedScheduleClient,
+    StaleScheduleError,
+    SnapshotFileError,
+    decode_schedule_payload,
+    dump_schedule,
+    load_schedule,
+    read_schedule_file,
+    write_schedule_file,
+)
+from app.logic import ScheduleRefresher, SchedulePublisher, ScheduleService
+from app.models import DaySchedule, MinuteInterval
+from app.utils import ApiConfig
+
+
+def make_schedule(*timeslots):
+    days = [date(2024, 10, 10), date(2024, 10, 11), date(2024, 10, 14)]
+    return {
+        day: DaySchedule(
+            day=day,
+            working_hours=MinuteInterval(540, 1080),
+            timeslots=tuple(MinuteInterval(start, end) for start, end in timeslots) if index != 1 else (),
+        )
+        for index, day in enumerate(days)
+    }
+
+
+class TestSnapshotFormat:
+    def test_round_trip(self):
+        schedule = make_schedule((600, 660), (570, 630))
+
+        assert load_schedule(dump_schedule(schedule)) == schedule
+
+    def test_empty_schedule(self):
+        assert load_schedule(dump_schedule({})) == {}
+
+    def test_corrupted_body(self):
+        data = bytearray(dump_schedule(make_schedule((600, 660))))
+        data[-1] ^= 0xFF
+
+        with pytest.raises(SnapshotFileError):
+            load_schedule(bytes(data))
+
+    def test_truncated(self):
+        with pytest.raises(SnapshotFileError):
+            load_schedule(dump_schedule(make_schedule((600, 660)))[:-2])
+
+
+@pytest.mark.asyncio
+class TestSharedScheduleClient:
+    async def test_reads_published_file(self, tmp_path):
+        path = tmp_path / "schedule.snapshot"
+        write_schedule_file(path, make_schedule((600, 660)))
+        client = SharedScheduleClient(ApiConfig(host="", port=0, cache_ttl=0), path)
+
+        first = await client.get_schedule()
+        second = await client.get_schedule()
+
+        assert first == make_schedule((600, 660))
+        assert second is first
+
+    async def test_rereads_replaced_file(self, tmp_path):
+        path = tmp_path / "schedule.snapshot"
+        write_schedule_file(path, make_schedule((600, 660)))
+        client = SharedScheduleClient(ApiConfig(host="", port=0, cache_ttl=0), path)
+        await client.get_schedule()
+
+        write_schedule_file(path, make_schedule((700, 720)))
+        os.utime(path, ns=(1, 1))
+
+        assert await client.get_schedule() == make_schedule((700, 720))
+
+    async def test_missing_file_is_upstream_error(self, tmp_path):
+        client = SharedScheduleClient(ApiConfig(host="", port=0), tmp_path / "missing")
+
+        with pytest.raises(APIConnectionError):
+            await client.get_schedule()
+
+
+@pytest.mark.asyncio
+class TestSchedulePublisher:
+    async def test_unchanged_schedule_is_not_rewritten(self, tmp_path):
+        path = tmp_path / "schedule.snapshot"
+        schedule = make_schedule((600, 660))
+        client = AsyncMock()
+        client.refresh_schedule.return_value = schedule
+        publisher = SchedulePublisher(client, path, interval=1)
+
+        assert await publisher.publish() is True
+        assert await publisher.publish() is True
+
+        assert publisher.publications == 1
+        assert load_schedule(path.read_bytes()) == schedule
+
+    async def test_failure_keeps_file(self, tmp_path):
+        path = tmp_path / "schedule.snapshot"
+        client = AsyncMock()
+        client.refresh_schedule.side_effect = ObjectNotFoundError("No data available")
+        publisher = SchedulePublisher(client, path, interval=1)
+
+        assert await publisher.publish() is False
+        assert publisher.failures == 1
+        assert not path.exists()
+
+
+class TestRunWorkers:
+    def test_exits_when_snapshot_is_not_published(self, tmp_path):
+        from app.__main__ import _run_workers
+        from app.utils import TestCaseApiConfig
+
+        config = TestCaseApiConfig.load("config.yaml")
+        config.snapshot_config.path = str(tmp_path / "schedule.snapshot")
+        with patch("app.__main__.multiprocessing") as multiprocessing, \
+                patch("app.__main__.SNAPSHOT_WAIT_TIMEOUT", 0.1), \
+                patch("app.__main__.uvicorn") as uvicorn:
+            with pytest.raises(SystemExit):
+                _run_workers(config, {})
+
+        publisher = multiprocessing.get_context.return_value.Process.return_value
+        publisher.terminate.assert_called_once_with()
+        uvicorn.run.assert_not_called()
+
+
+PAYLOAD = {
+    "days": [{"id": 1, "date": "2024-10-10", "start": "09:00", "end": "18:00"}],
+    "timeslots": [{"id": 1, "day_id": 1, "start": "10:00", "end": "11:00"}],
+}
+
+
+@pytest.mark.asyncio
+class TestPersistentSchedule:
+    @pytest.fixture
+    def upstream(self):
+        with patch("app.http_clients.schedule_client.handle_get_request", AsyncMock()) as request:
+            yield request
+
+    def make_client(self, path):
+        return ScheduleClient(ApiConfig(host="http://upstream", port=80, cache_ttl=0), snapshot_path=path)
+
+    async def test_fetched_schedule_is_persisted(self, tmp_path, upstream):
+        path = tmp_path / "schedule.snapshot"
+        upstream.return_value = decode_schedule_payload(json.dumps(PAYLOAD).encode())
+
+        schedule = await self.make_client(path).get_schedule()
+
+        assert read_schedule_file(path) == schedule
+
+    async def test_warm_start_does_not_request_upstream(self, tmp_path, upstream):
+        path = tmp_path / "schedule.snapshot"
+        write_schedule_file(path, make_schedule((600, 660)))
+        client = ScheduleClient(ApiConfig(host="http://upstream", port=80), snapshot_path=path)
+
+        assert client.load_snapshot_file() is True
+        assert await client.get_schedule() == make_schedule((600, 660))
+        upstream.assert_not_awaited()
+
+    async def test_outage_hands_out_persisted_schedule(self, tmp_path, upstream):
+        path = tmp_path / "schedule.snapshot"
+        write_schedule_file(path, make_schedule((600, 660)))
+        os.utime(path, (time.time() - 120, time.time() - 120))
+        upstream.side_effect = aiohttp.ClientConnectionError()
+        client = self.make_client(path)
+        client.load_snapshot_file()
+
+        with pytest.raises(StaleScheduleError) as exc_info:
+            await client.get_schedule()
+
+        assert exc_info.value.schedule == make_schedule((600, 660))
+        assert time.monotonic() - exc_info.value.confirmed_at >= 120
+        upstream.assert_awaited_once()
+
+    async def test_outage_is_visible_to_service(self, tmp_path, upstream):
+        upstream.return_value = decode_schedule_payload(json.dumps(PAYLOAD).encode())
+        service = ScheduleService(self.make_client(tmp_path / "schedule.snapshot"))
+        refresher = ScheduleRefresher(service, interval=60)
+        assert await refresher.refresh() is True
+        free = await service.get_free_intervals(date(2024, 10, 10))
+
+        upstream.side_effect = aiohttp.ClientConnectionError()
+        await asyncio.sleep(0.05)
+
+        # the last schedule is still served on demand, but with its real age
+        assert await service.get_free_intervals(date(2024, 10, 10)) == free
+        assert service.snapshot_age >= 0.05
+        assert await refresher.refresh() is False
+        assert refresher.failures == 1
+        assert service.snapshot_age >= 0.05
+
+    async def test_outage_without_snapshot_fails(self, tmp_path, upstream):
+        upstream.side_effect = aiohttp.ClientConnectionError()
+        client = self.make_client(tmp_path / "schedule.snapshot")
+
+        assert client.load_snapshot_file() is False
+        with pytest.raises(APIConnectionError):
+            await client.get_schedule()
+
+    async def test_corrupted_file_is_ignored(self, tmp_path, upstream):
+        path = tmp_path / "schedule.snapshot"
+        path.write_bytes(b"garbage")
+
+        assert self.make_client(path).load_snapshot_file() is False